@@ -1,5 +1,9 @@
 from django.contrib import admin
-from apps.api.models import CryptoCurrency, ConversionHistory
+from apps.api.models import CryptoCurrency, ConversionHistory, Holding, PriceAlert, PriceRefresh, TrackedCoin
 
 admin.site.register(CryptoCurrency)
 admin.site.register(ConversionHistory)
+admin.site.register(PriceRefresh)
+admin.site.register(TrackedCoin)
+admin.site.register(Holding)
+admin.site.register(PriceAlert)
@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from apps.api.models import PriceAlert
+
+logger = logging.getLogger(__name__)
+
+ALERT_BATCH_SIZE = 1000
+
+# Which market value each kind watches and whether it fires on the way up
+KIND_RULES = {
+    PriceAlert.KIND_PRICE_ABOVE: ("price", True),
+    PriceAlert.KIND_PRICE_BELOW: ("price", False),
+    PriceAlert.KIND_CHANGE_ABOVE: ("change", True),
+    PriceAlert.KIND_CHANGE_BELOW: ("change", False),
+}
+
+# Alerts saved this long before the last reload are fetched again, to cover
+# transactions that committed after that reload started
+RELOAD_OVERLAP = timedelta(seconds=5)
+
+
+def crossed(kind, threshold, old, new):
+    """Whether a move from `old` to `new` crosses `threshold` in the alert's direction."""
+    _, rising = KIND_RULES[kind]
+    return old < threshold <= new if rising else old > threshold >= new
+
+
+class AlertIndex:
+    """
+    Active alerts grouped per (coin, kind) into sorted threshold arrays.
+
+    A move from old to new only has to bisect the interval between them, so
+    finding the alerts triggered by an ingest costs O(log n) per moved coin
+    plus the number of matches, however many alerts exist. Entries are never
+    removed in place; stale ones are filtered out when matches are confirmed
+    against the database and dropped by the periodic full rebuild.
+    """
+
+    def __init__(self, rebuild_interval):
+        self.rebuild_interval = rebuild_interval
+        self.thresholds = {}
+        self.alert_ids = {}
+        self.entries = {}
+        self.loaded_at = None
+        self.built_at = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, alert_id, coin_id, kind, threshold):
+        entry = (coin_id, kind, threshold)
+        if self.entries.get(alert_id) == entry:
+            return
+        self.entries[alert_id] = entry
+
+        key = (coin_id, kind)
+        thresholds = self.thresholds.setdefault(key, [])
+        alert_ids = self.alert_ids.setdefault(key, [])
+        position = bisect_right(thresholds, threshold)
+        thresholds.insert(position, threshold)
+        alert_ids.insert(position, alert_id)
+
+    def build(self, alerts):
+        """Replace the index with (id, coin_id, kind, threshold) rows, sorting each group once."""
+        groups = {}
+        self.entries = {}
+        for alert_id, coin_id, kind, threshold in alerts:
+            threshold = float(threshold)
+            groups.setdefault((coin_id, kind), []).append((threshold, alert_id))
+            self.entries[alert_id] = (coin_id, kind, threshold)
+
+        self.thresholds = {}
+        self.alert_ids = {}
+        for key, group in groups.items():
+            group.sort()
+            self.thresholds[key] = [threshold for threshold, _ in group]
+            self.alert_ids[key] = [alert_id for _, alert_id in group]
+
+    def refresh(self):
+        """Rebuild from the database when due, otherwise load alerts saved since the last load."""
+        now = timezone.now()
+        columns = ("id", "coin_id", "kind", "threshold")
+
+        if self.built_at is None or time.monotonic() - self.built_at >= self.rebuild_interval:
+            self.build(PriceAlert.objects.filter(active=True).values_list(*columns).iterator(chunk_size=10_000))
+            self.built_at = time.monotonic()
+        else:
+            changed = PriceAlert.objects.filter(active=True, updated_at__gte=self.loaded_at - RELOAD_OVERLAP)
+            for alert_id, coin_id, kind, threshold in changed.values_list(*columns):
+                self.add(alert_id, coin_id, kind, float(threshold))
+
+        self.loaded_at = now
+
+    def candidates(self, moves):
+        """
+        Yield ids of alerts whose threshold lies between old and new values.
+        `moves` maps coin_id to {"price": (old, new), "change": (old, new)}.
+        """
+        for coin_id, values in moves.items():
+            for kind, (field, rising) in KIND_RULES.items():
+                thresholds = self.thresholds.get((coin_id, kind))
+                if not thresholds:
+                    continue
+
+                old, new = values[field]
+                if rising and new > old:
+                    start, end = bisect_right(thresholds, old), bisect_right(thresholds, new)
+                elif not rising and new < old:
+                    start, end = bisect_left(thresholds, new), bisect_left(thresholds, old)
+                else:
+                    continue
+                yield from self.alert_ids[(coin_id, kind)][start:end]
+
+
+class Notifier:
+    """Delivers triggered alerts. Subclass and point PRICE_ALERT_NOTIFIER at it."""
+
+    def notify(self, alerts):
+        """`alerts` are triggered PriceAlert rows with `user` and `coin` loaded."""
+        raise NotImplementedError
+
+
+class LogNotifier(Notifier):
+    """Write triggered alerts to the log."""
+
+    def notify(self, alerts):
+        for alert in alerts:
+            logger.info(
+                f"Alert #{alert.pk} for {alert.user.username}: {alert.coin.symbol} "
+                f"{alert.get_kind_display().lower()} {alert.threshold}"
+            )
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_notifier():
+    return import_string(settings.PRICE_ALERT_NOTIFIER)()
+
+
+def evaluate_alerts(moves, notifier=None):
+    """
+    Trigger every active alert crossed by the given price moves.
+    Runs after each ingest, which is already single-flight across workers.
+
+    Candidates come from the in-memory index and are confirmed against the
+    database, so alerts edited or removed since the index was loaded never
+    fire. Triggered alerts are deactivated and passed to the notifier.
+    Returns the triggered alerts.
+    """
+    global _index
+    with _lock:
+        if _index is None:
+            _index = AlertIndex(settings.PRICE_ALERT_INDEX_REBUILD)
+        _index.refresh()
+        candidate_ids = list(_index.candidates(moves))
+
+    if not candidate_ids:
+        return []
+
+    now = timezone.now()
+    triggered = []
+    for start in range(0, len(candidate_ids), ALERT_BATCH_SIZE):
+        batch = candidate_ids[start:start + ALERT_BATCH_SIZE]
+        rows = PriceAlert.objects.filter(pk__in=batch, active=True).select_related("user", "coin")
+        fired = [
+            alert
+            for alert in rows
+            if alert.coin_id in moves
+            and crossed(alert.kind, float(alert.threshold), *moves[alert.coin_id][KIND_RULES[alert.kind][0]])
+        ]
+        # Alerts fire once; re-arm them by setting active again
+        PriceAlert.objects.filter(pk__in=[alert.pk for alert in fired]).update(active=False, triggered_at=now)
+        triggered.extend(fired)
+
+    if triggered:
+        logger.info(f"{len(triggered)} price alerts triggered")
+        (notifier or get_notifier()).notify(triggered)
+    return triggered
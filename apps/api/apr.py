@@ -0,0 +1,106 @@
+import math
+
+# Compounding periods per year; simple interest and continuous compounding have no period
+COMPOUNDING_PERIODS = {
+    "simple": None,
+    "annually": 1,
+    "quarterly": 4,
+    "monthly": 12,
+    "weekly": 52,
+    "daily": 365,
+    "continuous": None,
+}
+
+# Longest per-period schedule returned for a single scenario
+SCHEDULE_MAX_PERIODS = 5000
+
+# Largest balance, in coins or USD, a scenario may reach; beyond it exp() overflows
+# long before the numbers mean anything
+SCENARIO_MAX_VALUE = 1e15
+
+
+def expand_range(start, stop, steps):
+    """Return `steps` evenly spaced values from `start` to `stop` inclusive."""
+    if steps == 1:
+        return [start]
+    step = (stop - start) / (steps - 1)
+    return [start + step * i for i in range(steps)]
+
+
+def _exponent(rate, compounding):
+    """
+    Continuous growth rate k such that the balance after t years is exp(k * t),
+    so each grid cell costs a single exp().
+    """
+    if compounding == "continuous":
+        return rate
+    periods = COMPOUNDING_PERIODS[compounding]
+    return periods * math.log1p(rate / periods)
+
+
+def log_growth(rate, term, compounding):
+    """Natural log of the growth factor for one scenario, computed without overflowing."""
+    fraction = rate / 100
+    if compounding == "simple":
+        return math.log1p(fraction * term)
+    return _exponent(fraction, compounding) * term
+
+
+def growth_grid(rates, terms, compounding):
+    """
+    Growth factors for every (rate, term) pair as a rates x terms matrix.
+    `rates` are annual percentages and `terms` are years.
+    """
+    fractions = [rate / 100 for rate in rates]
+    if compounding == "simple":
+        return [[1 + r * t for t in terms] for r in fractions]
+
+    exponents = [_exponent(r, compounding) for r in fractions]
+    return [[math.exp(k * t) for t in terms] for k in exponents]
+
+
+def schedule_periods(term, compounding):
+    """Number of schedule rows for a scenario; simple and continuous are shown yearly."""
+    return math.ceil(term * (COMPOUNDING_PERIODS[compounding] or 1))
+
+
+def growth_schedule(rate, term, compounding):
+    """(time in years, growth factor) at the end of every compounding period up to `term`."""
+    per_year = COMPOUNDING_PERIODS[compounding] or 1
+    times = [min(period / per_year, term) for period in range(1, schedule_periods(term, compounding) + 1)]
+    return list(zip(times, growth_grid([rate], times, compounding)[0]))
+
+
+def scenario_grid(principal, price, rates, terms, compounding, schedule=None):
+    """
+    Value `principal` coins under every rate x term x compounding scenario.
+
+    The price is passed in so the whole grid is valued against one snapshot.
+    Totals are in the coin; multiply by `price` for USD. `schedule`, a
+    (rate, term) pair, adds the per-period balances of that one scenario.
+    """
+    result = {
+        "principal_in_usd": round(principal * price, 2),
+        "rates": rates,
+        "terms": terms,
+        "grid": {
+            method: [[round(principal * factor, 8) for factor in row] for row in growth_grid(rates, terms, method)]
+            for method in compounding
+        },
+    }
+
+    if schedule is not None:
+        rate, term = schedule
+        result["schedules"] = {
+            method: [
+                {
+                    "time_years": round(time, 6),
+                    "total_in_crypto": round(principal * factor, 8),
+                    "interest_in_crypto": round(principal * (factor - 1), 8),
+                }
+                for time, factor in growth_schedule(rate, term, method)
+            ]
+            for method in compounding
+        }
+
+    return result
@@ -0,0 +1,164 @@
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from apps.api.models import PriceTick, PriceRollup
+
+RAW_TIER = "raw"
+
+TIER_SECONDS = {
+    PriceRollup.TIER_MINUTE: 60,
+    PriceRollup.TIER_HOUR: 3600,
+    PriceRollup.TIER_DAY: 86400,
+}
+
+
+def select_tier(span):
+    """
+    Pick the finest history tier that covers `span` within its retention
+    and yields no more than CHART_MAX_SOURCE_POINTS rows.
+    """
+    retention = settings.PRICE_HISTORY_RETENTION_DAYS
+    resolutions = [(RAW_TIER, settings.CRYPTO_REFRESH_INTERVAL)] + list(TIER_SECONDS.items())
+
+    for tier, seconds in resolutions:
+        days = retention.get(tier)
+        if days is not None and span > timedelta(days=days):
+            continue
+        if span.total_seconds() / seconds <= settings.CHART_MAX_SOURCE_POINTS:
+            return tier
+
+    return PriceRollup.TIER_DAY
+
+
+def _history_rows(coin_ids, tier, since):
+    """(coin_id, timestamp, price) rows of one tier from `since` on, unordered."""
+    if tier == RAW_TIER:
+        return PriceTick.objects.filter(coin_id__in=coin_ids, timestamp__gte=since).values_list(
+            "coin_id", "timestamp", "price_usd"
+        ), "timestamp"
+    return PriceRollup.objects.filter(coin_id__in=coin_ids, tier=tier, bucket__gte=since).values_list(
+        "coin_id", "bucket", "close"
+    ), "bucket"
+
+
+def load_series_many(coin_ids, tier, since, limit=None):
+    """
+    Return {coin_id: [(epoch seconds, price), ...]} for several coins in one query, oldest first.
+    With `limit`, returns None instead when the tier holds more rows than that.
+    """
+    rows, order = _history_rows(coin_ids, tier, since)
+    rows = rows.order_by(order)
+    if limit is not None:
+        rows = list(rows[:limit + 1])
+        if len(rows) > limit:
+            return None
+
+    series = {coin_id: [] for coin_id in coin_ids}
+    for coin_id, timestamp, price in rows:
+        series[coin_id].append((timestamp.timestamp(), float(price)))
+    return series
+
+
+def price_before(coin_id, tier, since):
+    """
+    Last known price of a coin before `since`, from `tier` or, failing that, a coarser one.
+    Ticks are only stored when a price changes, so a quiet coin may have none inside a window.
+    """
+    tiers = [RAW_TIER] + list(TIER_SECONDS)
+    for candidate in tiers[tiers.index(tier):]:
+        if candidate == RAW_TIER:
+            rows = PriceTick.objects.filter(coin_id=coin_id, timestamp__lt=since).order_by("-timestamp")
+            price = rows.values_list("price_usd", flat=True).first()
+        else:
+            rows = PriceRollup.objects.filter(coin_id=coin_id, tier=candidate, bucket__lt=since).order_by("-bucket")
+            price = rows.values_list("close", flat=True).first()
+        if price is not None:
+            return float(price)
+    return None
+
+
+def _seed(series, tier, since, now):
+    """Start every series at `since` with its last earlier price and carry its last price to `now`."""
+    for coin_id, rows in series.items():
+        seed = price_before(coin_id, tier, since)
+        if seed is not None:
+            rows.insert(0, (since.timestamp(), seed))
+        if rows and rows[-1][0] < now.timestamp():
+            rows.append((now.timestamp(), rows[-1][1]))
+    return series
+
+
+def load_chart_series(coin_ids, span):
+    """
+    Load the last `span` of several coins from the finest tier that holds at most
+    CHART_MAX_SOURCE_POINTS rows per coin. select_tier only estimates density
+    from the refresh interval, and imported history can be much denser, so
+    each tier is read with a hard LIMIT and a coarser one is tried when it
+    overflows. The day tier is the last resort and is cut to its newest rows.
+
+    Each series is seeded with the coin's last price before the window (one
+    query per coin) and extended to now, so a coin whose price did not move
+    during the window still has a flat series instead of none.
+    Returns (tier, {coin_id: series}).
+    """
+    limit = settings.CHART_MAX_SOURCE_POINTS * len(coin_ids)
+    now = timezone.now()
+    since = now - span
+    tiers = [RAW_TIER] + list(TIER_SECONDS)
+
+    for tier in tiers[tiers.index(select_tier(span)):]:
+        series = load_series_many(coin_ids, tier, since, limit)
+        if series is not None:
+            return tier, _seed(series, tier, since, now)
+
+    rows, order = _history_rows(coin_ids, PriceRollup.TIER_DAY, since)
+    series = {coin_id: [] for coin_id in coin_ids}
+    for coin_id, timestamp, price in reversed(rows.order_by(f"-{order}")[:limit]):
+        series[coin_id].append((timestamp.timestamp(), float(price)))
+    return PriceRollup.TIER_DAY, _seed(series, PriceRollup.TIER_DAY, since, now)
+
+
+def lttb(points, threshold):
+    """
+    Downsample (x, y) points to `threshold` points with Largest-Triangle-Three-Buckets,
+    which keeps the peaks and troughs that make up the visual shape of the series.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return points
+
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third vertex of the triangle
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        next_points = points[next_start:next_end]
+        avg_x = sum(x for x, _ in next_points) / len(next_points)
+        avg_y = sum(y for _, y in next_points) / len(next_points)
+
+        ax, ay = points[a]
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        max_area = -1.0
+        for j in range(start, end):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                a_next = j
+
+        sampled.append(points[a_next])
+        a = a_next
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def chart_series(crypto, span, points):
+    """Return the tier used and a downsampled price series covering the last `span`."""
+    tier, series = load_chart_series([crypto.pk], span)
+    return tier, lttb(series[crypto.pk], points)
@@ -0,0 +1,50 @@
+import hashlib
+from django.conf import settings
+from apps.api.models import CryptoCurrency, FxRate
+from apps.api.response_cache import accepts_gzip
+from apps.api.versioning import current_version, last_ingest_at
+
+
+def params_digest(request):
+    """Stable digest of the query string, since it changes the response body."""
+    params = sorted((key, value) for key, values in request.GET.lists() for value in values)
+    return hashlib.sha1(repr(params).encode()).hexdigest()[:16]
+
+
+def representation(request):
+    """
+    ETag suffix naming the bytes this request will get: the renderer format and,
+    when it may be served gzipped, the encoding. Strong ETags must differ for
+    different bytes, so plain and gzipped bodies never share one.
+    """
+    renderer = getattr(request, "accepted_renderer", None)
+    suffix = f"-{renderer.format}" if renderer is not None else ""
+    if settings.CRYPTO_RESPONSE_CACHE_GZIP and accepts_gzip(request):
+        suffix += "-gzip"
+    return suffix
+
+
+def crypto_list_etag(request, *args, **kwargs):
+    return f"list-{current_version()}-{params_digest(request)}{representation(request)}"
+
+
+def crypto_list_last_modified(request, *args, **kwargs):
+    return last_ingest_at()
+
+
+def crypto_detail_etag(request, symbol, *args, **kwargs):
+    return f"detail-{symbol}-{current_version()}-{params_digest(request)}{representation(request)}"
+
+
+def crypto_detail_last_modified(request, symbol, *args, **kwargs):
+    """
+    The row's last update or, for ?quote= reads, the quote rate's if later:
+    an FX-only refresh changes the quoted prices without touching the row.
+    """
+    last_updated = CryptoCurrency.objects.filter(symbol=symbol).values_list("last_updated", flat=True).first()
+    quote = request.GET.get("quote")
+    if last_updated is None or not quote:
+        return last_updated
+
+    rate_updated = FxRate.objects.filter(currency=quote.upper()).values_list("updated_at", flat=True).first()
+    return max(last_updated, rate_updated) if rate_updated else last_updated
@@ -0,0 +1,154 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+# FX rates are derived from this coin's quotes in each currency
+FX_REFERENCE_ID = "bitcoin"
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting requests to `rate` per second,
+    with bursts of up to `capacity` requests.
+    """
+
+    def __init__(self, rate, capacity):
+        if rate <= 0:
+            raise ValueError(f"Token bucket rate must be positive, got {rate}")
+        if capacity < 1:
+            raise ValueError(f"Token bucket capacity must be at least 1, got {capacity}")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold back every caller for `seconds`, e.g. after upstream answered 429."""
+        with self.lock:
+            self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class MarketFetcher:
+    """
+    Fetch /coins/markets pages in parallel over a pooled keep-alive session.
+    Concurrency is bounded by `max_workers` and request rate by a TokenBucket.
+    A 429 pauses the bucket for the upstream's Retry-After (or an exponential
+    backoff) and retries the request, up to `max_retries` times.
+    """
+
+    def __init__(
+        self, api_url=None, per_page=None, max_workers=None, rate=None, burst=None, timeout=10,
+        max_retries=None, backoff=None, fx_url=None,
+    ):
+        self.api_url = api_url or settings.COINGECKO_API_URL
+        self.fx_url = fx_url or settings.COINGECKO_FX_URL
+        self.per_page = per_page or settings.CRYPTO_FETCH_PAGE_SIZE
+        self.max_workers = max_workers or settings.CRYPTO_FETCH_WORKERS
+        self.timeout = timeout
+        self.max_retries = settings.CRYPTO_FETCH_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = settings.CRYPTO_FETCH_BACKOFF if backoff is None else backoff
+        self.bucket = TokenBucket(
+            rate or settings.CRYPTO_FETCH_RATE,
+            burst or settings.CRYPTO_FETCH_BURST,
+        )
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _retry_delay(self, response, attempt):
+        """Seconds to back off after a 429: Retry-After when given in seconds, else exponential."""
+        try:
+            return max(0.0, float(response.headers["Retry-After"]))
+        except (KeyError, ValueError):
+            return self.backoff * 2 ** attempt
+
+    def _get(self, url, params):
+        """GET `url` within the rate limit, retrying 429s; returns the decoded JSON body."""
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            response = self.session.get(url, params=params, timeout=self.timeout)
+            if response.status_code != 429 or attempt == self.max_retries:
+                break
+            self.bucket.pause(self._retry_delay(response, attempt))
+
+        response.raise_for_status()
+        return response.json()
+
+    def _get_page(self, params):
+        return self._get(
+            self.api_url, {"vs_currency": "usd", "order": "market_cap_desc", "sparkline": False, **params}
+        )
+
+    def _fetch_all(self, page_params):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pages = list(executor.map(self._get_page, page_params))
+        return [coin for page in pages for coin in page]
+
+    def fetch_ids(self, coin_ids):
+        """Fetch market data for the given upstream ids, one page per `per_page` ids."""
+        coin_ids = list(coin_ids)
+        chunks = [coin_ids[i:i + self.per_page] for i in range(0, len(coin_ids), self.per_page)]
+        return self._fetch_all(
+            {"ids": ",".join(chunk), "per_page": len(chunk), "page": 1} for chunk in chunks
+        )
+
+    def fetch_fx(self, currencies):
+        """
+        Return units of each fiat currency per USD, from a single /simple/price call
+        quoting one reference coin in USD and every requested currency.
+        """
+        vs_currencies = ["usd"] + [currency.lower() for currency in currencies]
+        body = self._get(self.fx_url, {"ids": FX_REFERENCE_ID, "vs_currencies": ",".join(vs_currencies)})
+        quotes = body[FX_REFERENCE_ID]
+
+        usd = Decimal(str(quotes["usd"]))
+        return {
+            currency.upper(): Decimal(str(quotes[currency.lower()])) / usd
+            for currency in currencies
+            if quotes.get(currency.lower())
+        }
+
+    def fetch_top(self, count):
+        """Fetch the top `count` coins by market cap."""
+        pages = math.ceil(count / self.per_page)
+        coins = self._fetch_all({"per_page": self.per_page, "page": page} for page in range(1, pages + 1))
+        return coins[:count]
+
+    def close(self):
+        self.session.close()
+
+
+_default_fetcher = None
+_default_fetcher_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Return the process-wide fetcher so keep-alive connections are reused across refreshes."""
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = MarketFetcher()
+        return _default_fetcher
@@ -0,0 +1,40 @@
+import math
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+
+class RangeFilter(filters.BaseFilterBackend):
+    """
+    Filter on min_<field> / max_<field> query parameters for each field
+    listed in the view's `range_filter_fields`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        for field in getattr(view, "range_filter_fields", []):
+            for prefix, lookup in (("min", "gte"), ("max", "lte")):
+                param = f"{prefix}_{field}"
+                value = request.query_params.get(param)
+                if value is None:
+                    continue
+                try:
+                    number = float(value)
+                except ValueError:
+                    raise ValidationError({param: "Must be a number."})
+                # float() accepts inf and nan, which integer columns cannot compare against
+                if not math.isfinite(number):
+                    raise ValidationError({param: "Must be a finite number."})
+                queryset = queryset.filter(**{f"{field}__{lookup}": number})
+        return queryset
+
+
+class StableOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter that always ends on a unique "id" tiebreak, so rows tied on
+    the requested keys keep one order and page boundaries never repeat or skip them.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view) or [])
+        if not any(field.lstrip("-") in ("id", "pk") for field in ordering):
+            ordering.append("id")
+        return ordering
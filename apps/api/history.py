@@ -0,0 +1,235 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from apps.api.models import CryptoCurrency, PriceTick, PriceRollup
+
+logger = logging.getLogger(__name__)
+
+TIERS = [PriceRollup.TIER_MINUTE, PriceRollup.TIER_HOUR, PriceRollup.TIER_DAY]
+
+ROLLUP_FIELDS = ["open", "high", "low", "close", "volume_24h", "tick_count"]
+
+HISTORY_BATCH_SIZE = 1000
+
+
+def bucket_start(timestamp, tier):
+    """Truncate a timestamp to the start of its bucket in the given tier."""
+    if tier == PriceRollup.TIER_MINUTE:
+        return timestamp.replace(second=0, microsecond=0)
+    if tier == PriceRollup.TIER_HOUR:
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _fold(rollups, coin_id, tier, timestamp, price, volume):
+    """Fold one tick into the rollup for its bucket, creating the rollup if needed."""
+    key = (coin_id, bucket_start(timestamp, tier))
+    rollup = rollups.get(key)
+
+    if rollup is None:
+        rollups[key] = PriceRollup(
+            coin_id=coin_id,
+            tier=tier,
+            bucket=key[1],
+            open=price,
+            high=price,
+            low=price,
+            close=price,
+            volume_24h=volume,
+            tick_count=1,
+        )
+        return
+
+    rollup.high = max(rollup.high, price)
+    rollup.low = min(rollup.low, price)
+    rollup.close = price
+    rollup.volume_24h = volume
+    rollup.tick_count += 1
+
+
+def _save_rollups(rollups):
+    PriceRollup.objects.bulk_create(
+        rollups,
+        batch_size=HISTORY_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["coin", "tier", "bucket"],
+        update_fields=ROLLUP_FIELDS,
+    )
+
+
+def record_ticks(cryptos, timestamp):
+    """
+    Append a tick for each CryptoCurrency and fold it into every rollup tier.
+
+    Ticks are assumed to be newer than anything already rolled up, which holds
+    for live ingests; backfills should call rebuild_rollups instead.
+    """
+    ticks = [
+        PriceTick(coin_id=crypto.pk, timestamp=timestamp, price_usd=crypto.price_usd, volume_24h=crypto.volume_24h)
+        for crypto in cryptos
+        if crypto.pk is not None
+    ]
+    if not ticks:
+        return 0
+
+    with transaction.atomic():
+        PriceTick.objects.bulk_create(ticks, batch_size=HISTORY_BATCH_SIZE, ignore_conflicts=True)
+
+        for tier in TIERS:
+            bucket = bucket_start(timestamp, tier)
+            rollups = {}
+            for start in range(0, len(ticks), HISTORY_BATCH_SIZE):
+                coin_ids = [tick.coin_id for tick in ticks[start:start + HISTORY_BATCH_SIZE]]
+                for rollup in PriceRollup.objects.filter(coin_id__in=coin_ids, tier=tier, bucket=bucket):
+                    # Upsert on (coin, tier, bucket), never on the primary key
+                    rollup.pk = None
+                    rollups[(rollup.coin_id, rollup.bucket)] = rollup
+
+            touched = {}
+            for tick in ticks:
+                _fold(rollups, tick.coin_id, tier, tick.timestamp, tick.price_usd, tick.volume_24h)
+                key = (tick.coin_id, bucket)
+                touched[key] = rollups[key]
+
+            _save_rollups(list(touched.values()))
+
+    return len(ticks)
+
+
+def _retention_cutoffs(now):
+    """Oldest bucket start worth keeping per tier; None for tiers kept forever."""
+    retention = settings.PRICE_HISTORY_RETENTION_DAYS
+    return {
+        tier: now - timedelta(days=retention[tier]) if retention.get(tier) is not None else None
+        for tier in TIERS
+    }
+
+
+def rebuild_rollups(since, until=None, coin_ids=None):
+    """
+    Recompute all rollup tiers from raw ticks in [since, until).
+
+    The window is widened to whole days so every rebuilt bucket is complete.
+    It must only cover periods whose raw ticks are still stored, or rollups
+    there would be lost. Buckets past a tier's retention are not rebuilt.
+    Returns the number of rollup rows written.
+    """
+    since = bucket_start(since, PriceRollup.TIER_DAY)
+    until = bucket_start(until or timezone.now(), PriceRollup.TIER_DAY) + timedelta(days=1)
+    cutoffs = _retention_cutoffs(timezone.now())
+
+    if coin_ids is None:
+        coin_ids = (
+            PriceTick.objects.filter(timestamp__gte=since, timestamp__lt=until)
+            .values_list("coin_id", flat=True)
+            .distinct()
+        )
+
+    written = 0
+    for coin_id in list(coin_ids):
+        rollups = {tier: {} for tier in TIERS}
+        ticks = (
+            PriceTick.objects.filter(coin_id=coin_id, timestamp__gte=since, timestamp__lt=until)
+            .order_by("timestamp")
+            .values_list("timestamp", "price_usd", "volume_24h")
+            .iterator(chunk_size=HISTORY_BATCH_SIZE)
+        )
+        for timestamp, price, volume in ticks:
+            for tier in TIERS:
+                if cutoffs[tier] is None or timestamp >= cutoffs[tier]:
+                    _fold(rollups[tier], coin_id, tier, timestamp, price, volume)
+
+        with transaction.atomic():
+            PriceRollup.objects.filter(coin_id=coin_id, bucket__gte=since, bucket__lt=until).delete()
+            for tier in TIERS:
+                _save_rollups(list(rollups[tier].values()))
+                written += len(rollups[tier])
+
+    return written
+
+
+def merge_rollups(since, until, coin_ids):
+    """
+    Fold backfilled raw ticks in [since, until] into every rollup tier without dropping rollups.
+
+    Buckets whose raw ticks are all still stored are recomputed from them. Older
+    buckets have lost their live ticks to retention, so an existing rollup there
+    keeps its open, close, volume and tick count and only widens its high and
+    low; buckets without a rollup yet are built from the backfilled ticks.
+    Returns the number of rollup rows written.
+    """
+    now = timezone.now()
+    since = bucket_start(since, PriceRollup.TIER_DAY)
+    until = bucket_start(until, PriceRollup.TIER_DAY) + timedelta(days=1)
+    cutoffs = _retention_cutoffs(now)
+    raw_days = settings.PRICE_HISTORY_RETENTION_DAYS.get("raw")
+    complete_from = now - timedelta(days=raw_days) if raw_days is not None else None
+
+    written = 0
+    for coin_id in list(coin_ids):
+        rollups = {tier: {} for tier in TIERS}
+        ticks = (
+            PriceTick.objects.filter(coin_id=coin_id, timestamp__gte=since, timestamp__lt=until)
+            .order_by("timestamp")
+            .values_list("timestamp", "price_usd", "volume_24h")
+            .iterator(chunk_size=HISTORY_BATCH_SIZE)
+        )
+        for timestamp, price, volume in ticks:
+            for tier in TIERS:
+                if cutoffs[tier] is None or timestamp >= cutoffs[tier]:
+                    _fold(rollups[tier], coin_id, tier, timestamp, price, volume)
+
+        with transaction.atomic():
+            for tier in TIERS:
+                built = rollups[tier]
+                if not built:
+                    continue
+                partial = [bucket for _, bucket in built if complete_from is not None and bucket < complete_from]
+                if partial:
+                    existing = PriceRollup.objects.filter(
+                        coin_id=coin_id, tier=tier, bucket__gte=min(partial), bucket__lte=max(partial)
+                    )
+                    for current in existing:
+                        rollup = built.get((coin_id, current.bucket))
+                        if rollup is None:
+                            continue
+                        rollup.open, rollup.close = current.open, current.close
+                        rollup.volume_24h, rollup.tick_count = current.volume_24h, current.tick_count
+                        rollup.high = max(rollup.high, current.high)
+                        rollup.low = min(rollup.low, current.low)
+
+                _save_rollups(list(built.values()))
+                written += len(built)
+
+    return written
+
+
+def prune_history(now=None):
+    """
+    Delete raw ticks and rollups older than their configured retention.
+    Deletes run per coin so each one is a range scan on the (coin, time) index.
+    Returns a mapping of tier (or "raw") to rows deleted.
+    """
+    now = now or timezone.now()
+    retention = settings.PRICE_HISTORY_RETENTION_DAYS
+    coin_ids = list(CryptoCurrency.objects.values_list("id", flat=True))
+
+    deleted = {}
+    for tier in ["raw"] + TIERS:
+        days = retention.get(tier)
+        if days is None:
+            continue
+        cutoff = now - timedelta(days=days)
+        deleted[tier] = 0
+
+        for coin_id in coin_ids:
+            if tier == "raw":
+                count, _ = PriceTick.objects.filter(coin_id=coin_id, timestamp__lt=cutoff).delete()
+            else:
+                count, _ = PriceRollup.objects.filter(coin_id=coin_id, tier=tier, bucket__lt=cutoff).delete()
+            deleted[tier] += count
+
+    logger.info(f"Pruned price history: {deleted}")
+    return deleted
@@ -0,0 +1,207 @@
+import csv
+import gzip
+import io
+import json
+import logging
+import math
+import os
+import time
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+from django.db import connection, transaction
+from apps.api.history import merge_rollups
+from apps.api.models import CryptoCurrency, ImportCheckpoint, PriceTick
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 5000
+
+# Exclusive upper bound of PriceTick.volume_24h, a signed 64-bit column
+MAX_VOLUME = 2 ** 63
+
+
+def open_dump(path):
+    """Open a dump as text, transparently decompressing .gz files."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", newline="")
+    return open(path, "r", newline="")
+
+
+def detect_format(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    return "ndjson" if name.endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def iter_records(stream, fmt):
+    """Yield one dict per record without reading the whole dump into memory."""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def parse_timestamp(value):
+    """Parse an ISO 8601 string or epoch seconds/milliseconds into an aware UTC datetime."""
+    if isinstance(value, (int, float)) or str(value).replace(".", "", 1).isdigit():
+        seconds = float(value)
+        if seconds > 1e11:
+            seconds /= 1000
+        return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+
+    timestamp = datetime.fromisoformat(str(value))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=dt_timezone.utc)
+    return timestamp
+
+
+def parse_price(value):
+    """Parse a price into a finite Decimal, or return None when it is missing or malformed."""
+    if value in (None, ""):
+        return None
+    try:
+        price = Decimal(str(value))
+    except InvalidOperation:
+        return None
+    return price if price.is_finite() else None
+
+
+def parse_volume(value):
+    """
+    Parse a 24h volume into an int; a missing volume is 0. Returns None when it
+    is malformed, non-finite or outside what a BigIntegerField holds.
+    """
+    if value in (None, ""):
+        return 0
+    try:
+        volume = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(volume) or not 0 <= volume < MAX_VOLUME:
+        return None
+    return int(volume)
+
+
+def _insert_bulk(ticks):
+    PriceTick.objects.bulk_create(ticks, batch_size=1000, ignore_conflicts=True)
+
+
+def _insert_copy(ticks):
+    """COPY a batch into a staging table, then merge it, skipping ticks that already exist."""
+    buffer = io.StringIO()
+    for tick in ticks:
+        buffer.write(f"{tick.coin_id}\t{tick.timestamp.isoformat()}\t{tick.price_usd}\t{tick.volume_24h}\n")
+    buffer.seek(0)
+
+    table = PriceTick._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS price_tick_staging "
+            "(coin_id bigint, timestamp timestamptz, price_usd numeric(20, 8), volume_24h bigint) "
+            "ON COMMIT DELETE ROWS"
+        )
+        cursor.copy_expert(
+            "COPY price_tick_staging (coin_id, timestamp, price_usd, volume_24h) FROM STDIN",
+            buffer,
+        )
+        cursor.execute(
+            f"INSERT INTO {table} (coin_id, timestamp, price_usd, volume_24h) "
+            "SELECT coin_id, timestamp, price_usd, volume_24h FROM price_tick_staging "
+            "ON CONFLICT (coin_id, timestamp) DO NOTHING"
+        )
+
+
+def import_history(path, fmt=None, batch_size=IMPORT_BATCH_SIZE, restart=False, progress=None):
+    """
+    Stream a CSV or NDJSON price dump (optionally gzipped) into PriceTick.
+
+    Records need symbol, timestamp and price_usd columns; volume_24h is optional.
+    Records for unknown coins or without a usable price, volume or timestamp are skipped.
+    Each batch is inserted with COPY on PostgreSQL or bulk_create elsewhere, and
+    the record offset is checkpointed in the same transaction, so an interrupted
+    import resumes exactly where it stopped. The imported window is merged into
+    the rollups at the end, without dropping rollups whose raw ticks have expired. `progress` is called with (records, rows per second).
+    Returns a dict of import statistics.
+    """
+    fmt = fmt or detect_format(path)
+    source = os.path.abspath(path)
+    insert = _insert_copy if connection.vendor == "postgresql" else _insert_bulk
+    coin_ids = dict(CryptoCurrency.objects.values_list("symbol", "id"))
+
+    checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=source)
+    if restart:
+        checkpoint.records = 0
+        checkpoint.finished = False
+        checkpoint.first_seen = checkpoint.last_seen = None
+        checkpoint.coin_ids = []
+        checkpoint.save()
+    if checkpoint.finished:
+        return {"records": checkpoint.records, "imported": 0, "skipped": 0, "resumed_from": checkpoint.records}
+
+    resumed_from = checkpoint.records
+    stats = {"records": 0, "imported": 0, "skipped": 0, "resumed_from": resumed_from}
+    # Start from what earlier runs committed, so rollups cover their rows too
+    touched_coins = set(checkpoint.coin_ids)
+    first_seen, last_seen = checkpoint.first_seen, checkpoint.last_seen
+    batch = []
+    started = time.perf_counter()
+
+    def flush():
+        with transaction.atomic():
+            if batch:
+                insert(batch)
+            checkpoint.records = stats["records"]
+            checkpoint.first_seen, checkpoint.last_seen = first_seen, last_seen
+            checkpoint.coin_ids = sorted(touched_coins)
+            checkpoint.save(update_fields=["records", "first_seen", "last_seen", "coin_ids", "updated_at"])
+        if progress and batch:
+            progress(stats["records"], (stats["records"] - resumed_from) / (time.perf_counter() - started))
+        stats["imported"] += len(batch)
+        batch.clear()
+
+    with open_dump(path) as stream:
+        for record in iter_records(stream, fmt):
+            stats["records"] += 1
+            if stats["records"] <= resumed_from:
+                continue
+
+            coin_id = coin_ids.get(str(record.get("symbol", "")).upper())
+            price = parse_price(record.get("price_usd", record.get("price")))
+            volume = parse_volume(record.get("volume_24h"))
+            try:
+                timestamp = parse_timestamp(record["timestamp"])
+            except (KeyError, TypeError, ValueError, OverflowError):
+                timestamp = None
+            if coin_id is None or price is None or volume is None or timestamp is None:
+                stats["skipped"] += 1
+                continue
+
+            batch.append(
+                PriceTick(
+                    coin_id=coin_id,
+                    timestamp=timestamp,
+                    price_usd=price,
+                    volume_24h=volume,
+                )
+            )
+            touched_coins.add(coin_id)
+            first_seen = min(first_seen or timestamp, timestamp)
+            last_seen = max(last_seen or timestamp, timestamp)
+
+            if len(batch) >= batch_size:
+                flush()
+
+    flush()
+
+    if touched_coins:
+        merge_rollups(first_seen, last_seen, coin_ids=touched_coins)
+
+    checkpoint.finished = True
+    checkpoint.save(update_fields=["finished", "updated_at"])
+
+    elapsed = time.perf_counter() - started
+    stats["rows_per_second"] = stats["imported"] / elapsed if elapsed else 0
+    logger.info(f"Imported {stats['imported']} ticks from {source} ({stats['rows_per_second']:.0f} rows/s)")
+    return stats
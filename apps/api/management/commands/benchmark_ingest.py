@@ -0,0 +1,104 @@
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from apps.api.models import CryptoCurrency
+from apps.api.services import ingest_market_data
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _stub_payload(size, tick):
+    """Build a /coins/markets style payload for `size` synthetic coins."""
+    return [
+        {
+            "id": f"bench-coin-{i}",
+            "symbol": f"bc{i}",
+            "name": f"Bench Coin {i}",
+            "current_price": 1 + i / 1000 + tick,
+            "market_cap": 1_000_000 + i,
+            "total_volume": 50_000 + i,
+            "price_change_percentage_24h": 0.5,
+            "circulating_supply": 10_000 + i,
+        }
+        for i in range(size)
+    ]
+
+
+def _legacy_ingest(crypto_data, id_map):
+    """The previous per-coin path: linear id lookup, one get and one save per coin."""
+    updated = []
+    with transaction.atomic():
+        for coin in crypto_data:
+            symbol = next((val for key, val in id_map.items() if key == coin["id"]), None)
+            if not symbol:
+                continue
+            try:
+                crypto = CryptoCurrency.objects.get(symbol=symbol)
+            except CryptoCurrency.DoesNotExist:
+                continue
+            crypto.price_usd = Decimal(str(coin["current_price"]))
+            crypto.market_cap = coin["market_cap"]
+            crypto.volume_24h = coin["total_volume"]
+            crypto.percent_change_24h = coin["price_change_percentage_24h"]
+            crypto.circulating_supply = coin["circulating_supply"]
+            crypto.save()
+            updated.append(symbol)
+    return updated
+
+
+class Command(BaseCommand):
+    help = "Benchmark price ingestion against a stubbed upstream payload"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[15, 1000, 10000])
+        parser.add_argument("--legacy", action="store_true", help="Also time the per-coin legacy path")
+
+    def _measure(self, label, size, ingest, payload, id_map):
+        queries = _QueryCounter()
+        with connection.execute_wrapper(queries):
+            start = time.perf_counter()
+            updated = ingest(payload, id_map)
+            elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{label:>12} {size:>6} coins: {len(updated):>6} updated, "
+            f"{queries.count:>6} queries, {elapsed * 1000:9.1f} ms"
+        )
+
+    def handle(self, *args, **options):
+        for size in options["sizes"]:
+            id_map = {f"bench-coin-{i}": f"BC{i}" for i in range(size)}
+            payload = _stub_payload(size, tick=0.01)
+
+            paths = [("bulk", lambda data, ids: ingest_market_data(data, ids).changed)]
+            if options["legacy"]:
+                paths.append(("legacy", _legacy_ingest))
+
+            for label, ingest in paths:
+                try:
+                    # Seed and measure inside a transaction that is always rolled back
+                    with transaction.atomic():
+                        CryptoCurrency.objects.bulk_create(
+                            [CryptoCurrency(symbol=symbol, name=symbol) for symbol in id_map.values()],
+                            batch_size=500,
+                        )
+                        self._measure(label, size, ingest, payload, id_map)
+                        # Same payload again: nothing moved, so nothing should be written
+                        self._measure(f"{label} rerun", size, ingest, payload, id_map)
+                        raise _Rollback
+                except _Rollback:
+                    pass
+
+        self.stdout.write(self.style.SUCCESS("✅ Ingest benchmark complete!"))
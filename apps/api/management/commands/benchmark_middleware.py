@@ -0,0 +1,67 @@
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+ALLAUTH_MIDDLEWARE = "allauth.account.middleware.AccountMiddleware"
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare per-request overhead of the full and lean middleware stacks on an API route"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000, help="Requests per measurement")
+        parser.add_argument("--path", default="/api/crypto-list/?limit=5")
+        parser.add_argument("--rounds", type=int, default=3, help="Interleaved rounds; the best of each is reported")
+
+    def _measure(self, path, token, count):
+        """Return microseconds per request through a freshly built handler."""
+        # A new client builds its handler, and so reads the middleware settings, on first use
+        client = Client(SERVER_NAME="localhost")
+        client.cookies["access_token"] = token
+        client.get(path)
+
+        start = time.perf_counter()
+        for _ in range(count):
+            client.get(path)
+        return (time.perf_counter() - start) / count * 1_000_000
+
+    def handle(self, *args, **options):
+        count = options["requests"]
+        path = options["path"]
+        # allauth refuses to start without its middleware, so it stays; the last profile shows what it costs
+        without_allauth = [name for name in settings.MIDDLEWARE if name != ALLAUTH_MIDDLEWARE]
+        profiles = [
+            ("full stack", {"LEAN_MIDDLEWARE_PATHS": []}),
+            ("lean stack", {}),
+            ("lean, no allauth", {"MIDDLEWARE": without_allauth}),
+        ]
+        best = {label: float("inf") for label, _ in profiles}
+
+        try:
+            with transaction.atomic():
+                user = User.objects.create(username="middleware-benchmark")
+                token = str(RefreshToken.for_user(user).access_token)
+
+                for _ in range(options["rounds"]):
+                    for label, overrides in profiles:
+                        with override_settings(**overrides):
+                            best[label] = min(best[label], self._measure(path, token, count))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        for label, per_request in best.items():
+            self.stdout.write(f"{label:>18}: {1_000_000 / per_request:9.1f} req/s, {per_request:7.1f} us/req")
+        self.stdout.write(
+            f"Lean stack saves {best['full stack'] - best['lean stack']:.1f} us/request; "
+            f"allauth still costs {best['lean stack'] - best['lean, no allauth']:.1f} us"
+        )
+        self.stdout.write(self.style.SUCCESS("✅ Middleware benchmark complete!"))
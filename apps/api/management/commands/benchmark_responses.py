@@ -0,0 +1,56 @@
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from apps.api.models import CryptoCurrency
+from apps.api.views import CryptoListView, CryptoDetailView, response_cache
+
+
+class Command(BaseCommand):
+    help = "Compare crypto list/detail throughput with and without the rendered response cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per measurement")
+        parser.add_argument("--gzip", action="store_true", help="Send Accept-Encoding: gzip")
+
+    def _measure(self, label, view, path, user, count, headers, **kwargs):
+        factory = APIRequestFactory(SERVER_NAME="localhost")
+        start = time.perf_counter()
+        for _ in range(count):
+            request = factory.get(path, **headers)
+            force_authenticate(request, user=user)
+            response = view(request, **kwargs)
+            if hasattr(response, "render"):
+                response.render()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{label:>28}: {count / elapsed:9.1f} req/s, {elapsed / count * 1000:7.2f} ms/req, "
+            f"{len(response.content):>8} bytes"
+        )
+
+    def handle(self, *args, **options):
+        first = CryptoCurrency.objects.order_by("symbol").first()
+        if first is None:
+            raise CommandError("No cryptocurrencies to serve; run populate_crypto first")
+
+        user = get_user_model()(username="benchmark")
+        count = options["requests"]
+        headers = {"HTTP_ACCEPT_ENCODING": "gzip"} if options["gzip"] else {}
+
+        targets = [
+            ("list", CryptoListView.as_view(), "/api/crypto-list/", {}),
+            ("list page", CryptoListView.as_view(), "/api/crypto-list/?limit=50&ordering=-market_cap", {}),
+            ("detail", CryptoDetailView.as_view(), f"/api/crypto-detail/{first.symbol}/", {"symbol": first.symbol}),
+        ]
+
+        self.stdout.write(f"{CryptoCurrency.objects.count()} cryptocurrencies, {count} requests each")
+        for name, view, path, kwargs in targets:
+            with override_settings(CRYPTO_RESPONSE_CACHE=False):
+                self._measure(f"{name} (serializer)", view, path, user, count, headers, **kwargs)
+
+            response_cache.entries.clear()
+            self._measure(f"{name} (cached)", view, path, user, count, headers, **kwargs)
+
+        self.stdout.write(self.style.SUCCESS("✅ Response benchmark complete!"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from apps.api.importer import IMPORT_BATCH_SIZE, import_history
+
+
+class Command(BaseCommand):
+    help = "Backfill price history from a CSV or NDJSON dump (optionally .gz)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint")
+
+    def handle(self, *args, **options):
+        def progress(records, rate):
+            self.stdout.write(f"{records} records read, {rate:,.0f} rows/s")
+
+        stats = import_history(
+            options["path"],
+            fmt=options["format"],
+            batch_size=options["batch_size"],
+            restart=options["restart"],
+            progress=progress,
+        )
+
+        if stats["resumed_from"]:
+            self.stdout.write(f"Resumed after record {stats['resumed_from']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Imported {stats['imported']} ticks, skipped {stats['skipped']} "
+                f"unknown symbols ({stats.get('rows_per_second', 0):,.0f} rows/s)"
+            )
+        )
@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from apps.api.models import CryptoCurrency
+from apps.api.versioning import record_ingest
 
 class Command(BaseCommand):
     help = "Populate the database with sample cryptocurrency data"
@@ -143,19 +145,22 @@ class Command(BaseCommand):
             },
         ]
 
-        for coin in crypto_data:
-            obj, created = CryptoCurrency.objects.update_or_create(
-                symbol=coin["symbol"],
-                defaults={
-                    "name": coin["name"],
-                    "price_usd": coin["price_usd"],
-                    "market_cap": coin["market_cap"],
-                    "volume_24h": coin["volume_24h"],
-                    "percent_change_24h": coin["percent_change_24h"],
-                    "circulating_supply": coin["circulating_supply"],
-                },
-            )
-            status = "Created" if created else "Updated"
-            self.stdout.write(f"{status} {coin['symbol']}")
+        with transaction.atomic():
+            for coin in crypto_data:
+                obj, created = CryptoCurrency.objects.update_or_create(
+                    symbol=coin["symbol"],
+                    defaults={
+                        "name": coin["name"],
+                        "price_usd": coin["price_usd"],
+                        "market_cap": coin["market_cap"],
+                        "volume_24h": coin["volume_24h"],
+                        "percent_change_24h": coin["percent_change_24h"],
+                        "circulating_supply": coin["circulating_supply"],
+                    },
+                )
+                status = "Created" if created else "Updated"
+                self.stdout.write(f"{status} {coin['symbol']}")
+
+            record_ingest([coin["symbol"] for coin in crypto_data])
 
         self.stdout.write(self.style.SUCCESS("✅ Crypto data population complete!"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from apps.api.history import prune_history
+from apps.api.versioning import prune_versions
+
+
+class Command(BaseCommand):
+    help = "Delete price ticks, rollups and ingest versions older than their retention period"
+
+    def handle(self, *args, **options):
+        deleted = prune_history()
+        for tier, count in deleted.items():
+            self.stdout.write(f"{tier}: {count} rows deleted")
+        self.stdout.write(f"ingest versions: {prune_versions()} rows deleted")
+
+        self.stdout.write(self.style.SUCCESS("✅ Price history pruned!"))
@@ -0,0 +1,19 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from apps.api.stats import rebuild_conversion_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute per-user conversion summaries from the full conversion history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", help="User id to rebuild (repeatable); defaults to all")
+
+    def handle(self, *args, **options):
+        user_ids = options["user"] or User.objects.values_list("id", flat=True).iterator()
+        count = 0
+        for user_id in user_ids:
+            rebuild_conversion_stats([user_id])
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt conversion stats for {count} users"))
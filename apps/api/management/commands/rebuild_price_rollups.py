@@ -0,0 +1,21 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.api.history import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute minute, hour and day price rollups from raw ticks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=1, help="How many days back to rebuild")
+
+    def handle(self, *args, **options):
+        raw_retention = settings.PRICE_HISTORY_RETENTION_DAYS["raw"]
+        if options["days"] >= raw_retention:
+            raise CommandError(f"--days must be less than the raw tick retention ({raw_retention} days)")
+
+        since = timezone.now() - timedelta(days=options["days"])
+        written = rebuild_rollups(since)
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt {written} rollups since {since:%Y-%m-%d}"))
@@ -0,0 +1,48 @@
+import logging
+import random
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from apps.api.refresh import refresh_prices
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Refresh cryptocurrency prices on a fixed interval with jitter"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=settings.CRYPTO_REFRESH_INTERVAL)
+        parser.add_argument("--jitter", type=float, default=settings.CRYPTO_REFRESH_JITTER)
+        parser.add_argument("--once", action="store_true", help="Run a single refresh and exit")
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        jitter = options["jitter"]
+
+        try:
+            while True:
+                try:
+                    refresh = refresh_prices(trigger="scheduler")
+                except Exception as e:
+                    # Typically the database being unreachable; try again on the next tick
+                    logger.exception("Price refresh failed")
+                    self.stderr.write(f"Refresh failed: {e}")
+                    close_old_connections()
+                else:
+                    if refresh is None:
+                        self.stdout.write("Refresh already in flight, skipped")
+                    else:
+                        self.stdout.write(
+                            f"Refresh #{refresh.pk} {refresh.status}: "
+                            f"{len(refresh.updated_symbols)} updated, {refresh.unchanged_count} unchanged"
+                        )
+
+                if options["once"]:
+                    break
+
+                # Jitter spreads out workers started at the same moment
+                time.sleep(max(0.0, interval + random.uniform(-jitter, jitter)))
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping price refresher")
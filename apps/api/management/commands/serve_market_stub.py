@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from apps.api.stub_server import canned_coins, make_stub_server
+
+
+class Command(BaseCommand):
+    help = "Serve canned /coins/markets pages locally for testing the market fetcher"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--coins", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        server = make_stub_server(options["host"], options["port"], canned_coins(options["coins"]))
+        self.stdout.write(
+            f"Serving {options['coins']} coins at "
+            f"http://{options['host']}:{server.server_port}/coins/markets"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping stub server")
+        finally:
+            server.server_close()
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from apps.api.fetcher import MarketFetcher
+from apps.api.models import TrackedCoin
+
+
+class Command(BaseCommand):
+    help = "Track the top N coins by market cap from the upstream API"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=1000)
+        parser.add_argument("--api-url", help="Override COINGECKO_API_URL, e.g. a local stub server")
+
+    def handle(self, *args, **options):
+        fetcher = MarketFetcher(api_url=options["api_url"])
+        try:
+            coins = fetcher.fetch_top(options["top"])
+        finally:
+            fetcher.close()
+
+        tracked = TrackedCoin.objects.values_list("coingecko_id", "symbol")
+        known_ids = {coingecko_id for coingecko_id, _ in tracked}
+        taken_symbols = {symbol for _, symbol in tracked}
+
+        new_coins = []
+        for coin in coins:
+            symbol = coin["symbol"].upper()
+            # Upstream symbols are not unique; the higher market cap coin wins
+            if coin["id"] in known_ids or symbol in taken_symbols or len(symbol) > 10:
+                continue
+            taken_symbols.add(symbol)
+            new_coins.append(TrackedCoin(coingecko_id=coin["id"], symbol=symbol))
+
+        TrackedCoin.objects.bulk_create(new_coins, batch_size=500)
+        self.stdout.write(self.style.SUCCESS(f"✅ Tracking {len(new_coins)} new coins ({len(coins)} fetched)"))
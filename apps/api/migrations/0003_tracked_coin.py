@@ -0,0 +1,60 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:01
+
+from django.db import migrations, models
+
+# Coins tracked before the universe moved into the database
+INITIAL_UNIVERSE = {
+    "BTC": "bitcoin",
+    "ETH": "ethereum",
+    "USDT": "tether",
+    "BNB": "binancecoin",
+    "SOL": "solana",
+    "XRP": "ripple",
+    "ADA": "cardano",
+    "DOGE": "dogecoin",
+    "MATIC": "matic-network",
+    "DOT": "polkadot",
+    "AVAX": "avalanche-2",
+    "TRX": "tron",
+    "LTC": "litecoin",
+    "SHIB": "shiba-inu",
+    "WBTC": "wrapped-bitcoin",
+}
+
+
+def seed_universe(apps, schema_editor):
+    TrackedCoin = apps.get_model("api", "TrackedCoin")
+    TrackedCoin.objects.bulk_create(
+        [
+            TrackedCoin(symbol=symbol, coingecko_id=coingecko_id)
+            for symbol, coingecko_id in INITIAL_UNIVERSE.items()
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_price_refresh"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrackedCoin",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("coingecko_id", models.CharField(max_length=100, unique=True)),
+                ("symbol", models.CharField(max_length=10, unique=True)),
+                ("enabled", models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.RunPython(seed_universe, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_tracked_coin"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pricerefresh",
+            name="unchanged_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_import_checkpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IngestVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("changed_symbols", models.JSONField(blank=True, default=list)),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_conversion_stats"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cryptocurrency",
+            index=models.Index(fields=["market_cap"], name="crypto_market_cap_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="cryptocurrency",
+            index=models.Index(fields=["volume_24h"], name="crypto_volume_24h_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="cryptocurrency",
+            index=models.Index(
+                fields=["percent_change_24h"], name="crypto_change_24h_idx"
+            ),
+        ),
+    ]
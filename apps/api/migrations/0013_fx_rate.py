@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0012_price_alert"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FxRate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("currency", models.CharField(max_length=3, unique=True)),
+                ("per_usd", models.DecimalField(decimal_places=8, max_digits=20)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0013_fx_rate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importcheckpoint",
+            name="coin_ids",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="importcheckpoint",
+            name="first_seen",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="importcheckpoint",
+            name="last_seen",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -11,11 +11,91 @@ class CryptoCurrency(models.Model):
     circulating_supply = models.BigIntegerField(default=0)
     last_updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["market_cap"], name="crypto_market_cap_idx"),
+            models.Index(fields=["volume_24h"], name="crypto_volume_24h_idx"),
+            models.Index(fields=["percent_change_24h"], name="crypto_change_24h_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.symbol})"
 
+class IngestVersion(models.Model):
+    # The auto-increment primary key is the version number
+    created_at = models.DateTimeField(auto_now_add=True)
+    changed_symbols = models.JSONField(default=list, blank=True)
+
+    def __str__(self):
+        return f"Version {self.pk} ({len(self.changed_symbols)} changed)"
+
+class PriceTick(models.Model):
+    # The (coin, timestamp) unique index serves range scans, so the FK needs no index of its own
+    coin = models.ForeignKey(CryptoCurrency, on_delete=models.CASCADE, related_name="ticks", db_index=False)
+    timestamp = models.DateTimeField()
+    price_usd = models.DecimalField(max_digits=20, decimal_places=8)
+    volume_24h = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["coin", "timestamp"], name="unique_tick_per_coin_time"),
+        ]
+
+    def __str__(self):
+        return f"{self.coin_id} @ {self.timestamp}: {self.price_usd}"
+
+class PriceRollup(models.Model):
+    TIER_MINUTE = "minute"
+    TIER_HOUR = "hour"
+    TIER_DAY = "day"
+    TIER_CHOICES = [
+        (TIER_MINUTE, "Minute"),
+        (TIER_HOUR, "Hour"),
+        (TIER_DAY, "Day"),
+    ]
+
+    coin = models.ForeignKey(CryptoCurrency, on_delete=models.CASCADE, related_name="rollups", db_index=False)
+    tier = models.CharField(max_length=6, choices=TIER_CHOICES)
+    bucket = models.DateTimeField()
+    open = models.DecimalField(max_digits=20, decimal_places=8)
+    high = models.DecimalField(max_digits=20, decimal_places=8)
+    low = models.DecimalField(max_digits=20, decimal_places=8)
+    close = models.DecimalField(max_digits=20, decimal_places=8)
+    volume_24h = models.BigIntegerField(default=0)
+    tick_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["coin", "tier", "bucket"], name="unique_rollup_bucket"),
+        ]
+
+    def __str__(self):
+        return f"{self.coin_id} {self.tier} @ {self.bucket}: {self.close}"
+
+class ImportCheckpoint(models.Model):
+    source = models.CharField(max_length=255, unique=True)
+    records = models.BigIntegerField(default=0)
+    finished = models.BooleanField(default=False)
+    # Window and coins imported so far, so a resumed import rebuilds rollups for all of them
+    first_seen = models.DateTimeField(null=True, blank=True)
+    last_seen = models.DateTimeField(null=True, blank=True)
+    coin_ids = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source}: {self.records} records"
+
+class TrackedCoin(models.Model):
+    coingecko_id = models.CharField(max_length=100, unique=True)
+    symbol = models.CharField(max_length=10, unique=True)
+    enabled = models.BooleanField(default=True)
+
+    def __str__(self):
+        return f"{self.symbol} ({self.coingecko_id})"
+
 class ConversionHistory(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Covered by the (user, timestamp, id) index below
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     from_currency = models.CharField(max_length=10)
     to_currency = models.CharField(max_length=10)
     amount = models.DecimalField(max_digits=20, decimal_places=8)
@@ -23,6 +103,124 @@ class ConversionHistory(models.Model):
     conversion_rate = models.DecimalField(max_digits=20, decimal_places=8)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-timestamp", "-id"], name="conversion_user_time_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.from_currency} to {self.to_currency}"
 
+
+class PriceRefresh(models.Model):
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SUCCEEDED, "Succeeded"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    trigger = models.CharField(max_length=20)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_symbols = models.JSONField(default=list, blank=True)
+    unchanged_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"Refresh #{self.pk} ({self.status})"
+
+class RefreshLock(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    owner = models.CharField(max_length=32, blank=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} (until {self.expires_at})"
+
+class ConversionPairStats(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    from_currency = models.CharField(max_length=10)
+    to_currency = models.CharField(max_length=10)
+    conversion_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=30, decimal_places=8, default=0)
+    total_converted_amount = models.DecimalField(max_digits=30, decimal_places=8, default=0)
+    last_converted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "from_currency", "to_currency"], name="unique_user_pair_stats"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.from_currency} to {self.to_currency} x{self.conversion_count}"
+
+class ConversionDailyStats(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    date = models.DateField()
+    conversion_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "date"], name="unique_user_daily_stats"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} on {self.date}: {self.conversion_count}"
+
+class Holding(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="holdings", db_index=False)
+    coin = models.ForeignKey(CryptoCurrency, on_delete=models.CASCADE, related_name="holdings")
+    amount = models.DecimalField(max_digits=20, decimal_places=8)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "coin"], name="unique_user_holding"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.amount} {self.coin_id}"
+
+class PriceAlert(models.Model):
+    KIND_PRICE_ABOVE = "price_above"
+    KIND_PRICE_BELOW = "price_below"
+    KIND_CHANGE_ABOVE = "change_above"
+    KIND_CHANGE_BELOW = "change_below"
+    KIND_CHOICES = [
+        (KIND_PRICE_ABOVE, "Price rises to"),
+        (KIND_PRICE_BELOW, "Price falls to"),
+        (KIND_CHANGE_ABOVE, "24h change rises to"),
+        (KIND_CHANGE_BELOW, "24h change falls to"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="price_alerts")
+    coin = models.ForeignKey(CryptoCurrency, on_delete=models.CASCADE, related_name="alerts")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # A price in USD, or a 24h change in percent for the change kinds
+    threshold = models.DecimalField(max_digits=20, decimal_places=8)
+    active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    triggered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Serves the alert engine's incremental reloads
+            models.Index(fields=["updated_at"], name="alert_updated_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.coin_id} {self.kind} {self.threshold}"
+
+class FxRate(models.Model):
+    currency = models.CharField(max_length=3, unique=True)
+    # Units of this fiat currency per US dollar
+    per_usd = models.DecimalField(max_digits=20, decimal_places=8)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.currency}: {self.per_usd} per USD"
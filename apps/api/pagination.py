@@ -0,0 +1,107 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, PageNumberPagination
+
+POSITION_SEPARATOR = "|"
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination keyed on every field of `ordering`, not just the first.
+
+    DRF's cursor stores the first field's value plus an offset into the rows
+    tied on it, so a page of tied rows is followed by offset paging and rows
+    inserted meanwhile shift it. Here a cursor holds the whole key of the row
+    it stops at and the next page starts strictly after that key, so with a
+    unique last field (such as "-id") pages never repeat or skip rows.
+    All ordering fields must sort in the same direction.
+    """
+
+    def _position(self, instance):
+        return POSITION_SEPARATOR.join(str(getattr(instance, name.lstrip("-"))) for name in self.ordering)
+
+    def _after(self, queryset, position, descending):
+        """Filter to rows strictly past `position` in a scan that is `descending` or not."""
+        names = [name.lstrip("-") for name in self.ordering]
+        parts = position.split(POSITION_SEPARATOR)
+        if len(parts) != len(names):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = [queryset.model._meta.get_field(name).to_python(part) for name, part in zip(names, parts)]
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+        lookup = "lt" if descending else "gt"
+        condition = Q()
+        for index, name in enumerate(names):
+            condition |= Q(**dict(zip(names[:index], values[:index])), **{f"{name}__{lookup}": values[index]})
+        return queryset.filter(condition)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse, position = (self.cursor.reverse, self.cursor.position) if self.cursor else (False, None)
+
+        descending = self.ordering[0].startswith("-")
+        queryset = queryset.order_by(*(self.ordering if not reverse else [
+            name[1:] if name.startswith("-") else f"-{name}" for name in self.ordering
+        ]))
+        if position is not None:
+            queryset = self._after(queryset, position, descending != reverse)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+
+        first = self._position(self.page[0]) if self.page else position
+        last = self._position(self.page[-1]) if self.page else position
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        self.next_position, self.previous_position = last, first
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.previous_position))
+
+
+class ConversionHistoryPagination(KeysetPagination):
+    """
+    Keyset pagination over a user's history, newest first.
+    Each page is a range scan on the (user, timestamp, id) index,
+    so fetching page 1000 costs the same as fetching page 1.
+    """
+
+    page_size = 50
+    page_size_query_param = "limit"
+    max_page_size = 500
+    ordering = ("-timestamp", "-id")
+
+
+class CryptoListPagination(PageNumberPagination):
+    """
+    Page/limit pagination that only kicks in when `limit` is given,
+    so clients that expect the plain list keep working.
+    """
+
+    page_size = None
+    page_size_query_param = "limit"
+    max_page_size = 500
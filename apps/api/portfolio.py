@@ -0,0 +1,106 @@
+from collections import defaultdict
+from apps.api.charts import load_chart_series, lttb
+from apps.api.models import CryptoCurrency, Holding
+from apps.api.rates import get_price_snapshot
+
+USD = "USD"
+
+
+def load_holdings(user_ids=None):
+    """Return {user_id: [(symbol, amount), ...]} for the given users (all users by default) in one query."""
+    queryset = Holding.objects.filter(amount__gt=0)
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+
+    holdings = defaultdict(list)
+    for user_id, symbol, amount in queryset.values_list("user_id", "coin__symbol", "amount"):
+        holdings[user_id].append((symbol, float(amount)))
+    return holdings
+
+
+def value_portfolios(holdings, snapshot, quote=USD):
+    """
+    Value every portfolio in `holdings` against one PriceSnapshot.
+
+    Prices are read once per distinct symbol, so valuing thousands of users
+    costs one multiply-add per holding. Values are in `quote`: USD, a coin
+    symbol or a fiat currency from the FX table. Returns
+    {user_id: {"total": ..., "holdings": {symbol: value}}}, or None when the
+    quote has no price.
+    """
+    quote_price = 1.0 if quote == USD else snapshot.price(quote)
+    if quote_price is None:
+        return None
+    quote_price = float(quote_price)
+
+    symbols = {symbol for positions in holdings.values() for symbol, _ in positions}
+    # Unpriced coins are worth nothing rather than failing the whole valuation
+    prices = {symbol: float(snapshot.price(symbol) or 0) / quote_price for symbol in symbols}
+
+    valuations = {}
+    for user_id, positions in holdings.items():
+        values = {symbol: amount * prices[symbol] for symbol, amount in positions}
+        valuations[user_id] = {"total": sum(values.values()), "holdings": values}
+    return valuations
+
+
+def _forward_fill(series, timestamps):
+    """Price of a series at each timestamp, carrying the last known price forward (None before the first)."""
+    filled = []
+    index, price = 0, None
+    for timestamp in timestamps:
+        while index < len(series) and series[index][0] <= timestamp:
+            price = series[index][1]
+            index += 1
+        filled.append(price)
+    return filled
+
+
+def portfolio_history(positions, span, points, quote=USD, snapshot=None):
+    """
+    Value a list of (symbol, amount) positions over the last `span`.
+
+    All coin series come from load_chart_series, seeded with each coin's price
+    before the window. They are aligned on the union of their timestamps with
+    forward fill and summed column by column; timestamps before every coin has
+    a price are skipped. `quote` is USD, a coin, or a fiat currency from the
+    FX table, resolved like value_portfolios does; no FX history is kept, so
+    fiat values use the current rate throughout. Returns (tier, downsampled
+    [(epoch seconds, value)]), or None when the quote is unknown.
+    """
+    snapshot = snapshot or get_price_snapshot()
+    symbols = {symbol for symbol, _ in positions}
+    if quote != USD:
+        symbols.add(quote)
+    coin_ids = dict(CryptoCurrency.objects.filter(symbol__in=symbols).values_list("symbol", "id"))
+
+    # USD per unit of a fiat quote; coin quotes follow their own price series
+    fiat_price = 1.0
+    if quote != USD and quote not in coin_ids:
+        per_usd = snapshot.fx_rate(quote)
+        if per_usd is None:
+            return None
+        fiat_price = 1 / float(per_usd)
+
+    tier, series = load_chart_series(list(coin_ids.values()), span)
+    timestamps = sorted({timestamp for rows in series.values() for timestamp, _ in rows})
+
+    # holdings x timestamps: each row is one coin's amount-weighted prices
+    matrix = [
+        [amount * price if price is not None else None for price in _forward_fill(series[coin_ids[symbol]], timestamps)]
+        for symbol, amount in positions
+        if symbol in coin_ids
+    ]
+    if quote in coin_ids:
+        quotes = _forward_fill(series[coin_ids[quote]], timestamps)
+    else:
+        quotes = [fiat_price] * len(timestamps)
+
+    values = []
+    for column, timestamp in enumerate(timestamps):
+        cells = [row[column] for row in matrix]
+        if None in cells or not quotes[column]:
+            continue
+        values.append((timestamp, sum(cells) / quotes[column]))
+
+    return tier, lttb(values, points)
@@ -0,0 +1,83 @@
+import threading
+from decimal import Decimal
+from apps.api.models import CryptoCurrency, FxRate
+from apps.api.versioning import current_version
+
+# Base rows kept per snapshot before the row cache is reset
+RATE_ROW_CACHE_SIZE = 256
+
+
+class PriceSnapshot:
+    """
+    Immutable USD prices for every coin, and units per USD for every fiat
+    currency in the FX table, at one ingest version.
+
+    The all-pairs rate matrix is rank one (rate[a][b] = price[a] / price[b]),
+    so it is kept as the price vector: any single rate is one division and a
+    full base row is computed once per version and cached. Fiat currencies
+    are priced from the FX table, so any coin converts to any of them too.
+    """
+
+    def __init__(self, version, prices, fx=None):
+        self.version = version
+        self.prices = prices
+        self.fx = {"USD": Decimal(1), **(fx or {})}
+        self._rows = {}
+
+    def price(self, symbol):
+        """USD price of a coin or fiat currency, or None if unknown."""
+        price = self.prices.get(symbol)
+        if price:
+            return price
+        per_usd = self.fx.get(symbol)
+        return 1 / per_usd if per_usd else None
+
+    def fx_rate(self, currency):
+        """Units of a fiat currency per USD, or None if it is not in the FX table."""
+        per_usd = self.fx.get(currency)
+        return per_usd if per_usd else None
+
+    def rate(self, from_symbol, to_symbol):
+        """Units of `to_symbol` per unit of `from_symbol`, or None if either price is unknown."""
+        from_price = self.price(from_symbol)
+        to_price = self.price(to_symbol)
+        if from_price is None or to_price is None:
+            return None
+        return from_price / to_price
+
+    def rates_for(self, base):
+        """Units of every priced coin per unit of `base`, or None if `base` is unknown."""
+        row = self._rows.get(base)
+        if row is not None:
+            return row
+
+        base_price = self.price(base)
+        if base_price is None:
+            return None
+
+        row = {symbol: float(base_price / price) for symbol, price in self.prices.items() if price}
+        if len(self._rows) >= RATE_ROW_CACHE_SIZE:
+            self._rows = {}
+        self._rows[base] = row
+        return row
+
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+def get_price_snapshot():
+    """Return this worker's PriceSnapshot, reloading it when the ingest version moves."""
+    global _snapshot
+    version = current_version()
+
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            prices = dict(CryptoCurrency.objects.values_list("symbol", "price_usd"))
+            fx = dict(FxRate.objects.values_list("currency", "per_usd"))
+            _snapshot = PriceSnapshot(version, prices, fx)
+        return _snapshot
@@ -0,0 +1,126 @@
+import logging
+import threading
+import uuid
+from datetime import timedelta
+import requests
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from apps.api.models import PriceRefresh, RefreshLock
+from apps.api.services import update_prices
+
+logger = logging.getLogger(__name__)
+
+REFRESH_LOCK_NAME = "price-refresh"
+
+# Guards against spawning more than one background refresh thread per process
+_thread_lock = threading.Lock()
+
+
+def acquire_lock(name, ttl):
+    """
+    Take a database lease named `name` for `ttl` seconds.
+    Returns an owner token, or None if the lease is held by someone else.
+    """
+    now = timezone.now()
+    owner = uuid.uuid4().hex
+    expires_at = now + timedelta(seconds=ttl)
+
+    lock, created = RefreshLock.objects.get_or_create(
+        name=name, defaults={"owner": owner, "expires_at": expires_at}
+    )
+    if created:
+        return owner
+
+    # Only an expired lease can be taken over; the conditional update is atomic
+    taken = RefreshLock.objects.filter(name=name, expires_at__lte=now).update(
+        owner=owner, expires_at=expires_at
+    )
+    return owner if taken else None
+
+
+def release_lock(name, owner):
+    """Release a lease previously returned by acquire_lock."""
+    RefreshLock.objects.filter(name=name, owner=owner).update(expires_at=timezone.now())
+
+
+def latest_refresh():
+    """Return the most recent completed PriceRefresh, or None."""
+    return (
+        PriceRefresh.objects.filter(status=PriceRefresh.STATUS_SUCCEEDED)
+        .order_by("-finished_at")
+        .first()
+    )
+
+
+def is_stale(refresh):
+    """Whether a refresh is older than the configured refresh interval."""
+    if refresh is None:
+        return True
+    age = timezone.now() - refresh.finished_at
+    return age > timedelta(seconds=settings.CRYPTO_REFRESH_INTERVAL)
+
+
+def refresh_prices(trigger="scheduler"):
+    """
+    Fetch and ingest prices unless another refresh is already running.
+    Concurrent callers are collapsed onto a single database lease.
+    Returns the finished PriceRefresh, or None if the refresh was skipped.
+    """
+    owner = acquire_lock(REFRESH_LOCK_NAME, settings.CRYPTO_REFRESH_LOCK_TTL)
+    if owner is None:
+        logger.info("Price refresh already in flight, skipping")
+        return None
+
+    refresh = PriceRefresh.objects.create(trigger=trigger)
+    try:
+        result = update_prices()
+        refresh.updated_symbols = result.changed
+        refresh.unchanged_count = len(result.unchanged)
+        refresh.status = PriceRefresh.STATUS_SUCCEEDED
+        logger.info(
+            f"Refresh #{refresh.pk} updated {len(result.changed)} cryptocurrencies, "
+            f"{len(result.unchanged)} unchanged"
+        )
+    except requests.RequestException as e:
+        refresh.status = PriceRefresh.STATUS_FAILED
+        refresh.error = str(e)
+        logger.error(f"Refresh #{refresh.pk} failed: {e}")
+    except Exception as e:
+        # Database errors or malformed upstream data: record them instead of leaving the row running
+        refresh.status = PriceRefresh.STATUS_FAILED
+        refresh.error = f"{type(e).__name__}: {e}"
+        logger.exception(f"Refresh #{refresh.pk} crashed")
+    finally:
+        refresh.finished_at = timezone.now()
+        refresh.save(update_fields=["status", "finished_at", "updated_symbols", "unchanged_count", "error"])
+        release_lock(REFRESH_LOCK_NAME, owner)
+
+    return refresh
+
+
+def _run_in_background(trigger):
+    try:
+        refresh_prices(trigger=trigger)
+    except Exception:
+        logger.exception("Background price refresh crashed")
+    finally:
+        connection.close()
+        _thread_lock.release()
+
+
+def trigger_refresh(trigger="request"):
+    """
+    Start a refresh on a background thread without waiting for it.
+    Returns False if this process already has one running.
+
+    The thread runs a full update_prices in this web worker, including the
+    price alert evaluation that follows each ingest (see alerts.evaluate_alerts):
+    the worker builds its own alert index and calls the notifier itself.
+    """
+    if not _thread_lock.acquire(blocking=False):
+        return False
+
+    thread = threading.Thread(target=_run_in_background, args=(trigger,), daemon=True)
+    thread.start()
+    return True
@@ -0,0 +1,74 @@
+import gzip
+import threading
+from collections import OrderedDict
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+
+def accepts_gzip(request):
+    return "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+
+
+class RenderedResponse:
+    """A response body rendered once, kept both plain and (optionally) gzipped."""
+
+    def __init__(self, body, content_type, compress):
+        self.body = body
+        self.content_type = content_type
+        self.gzipped = gzip.compress(body, compresslevel=6) if compress and len(body) >= GZIP_MIN_BYTES else None
+
+    def to_response(self, request):
+        if self.gzipped is not None and accepts_gzip(request):
+            response = HttpResponse(self.gzipped, content_type=self.content_type)
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(self.body, content_type=self.content_type)
+
+        # The ETag depends on Accept-Encoding even when this body stayed plain
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
+
+
+class ResponseCache:
+    """
+    Per-process LRU of rendered responses for one ingest version.
+    Entries from older versions are dropped as soon as a newer version is seen.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.version = None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        with self.lock:
+            if version != self.version:
+                self.version = version
+                self.entries.clear()
+
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, version, entry):
+        with self.lock:
+            if version != self.version:
+                return
+            self.entries[key] = entry
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return {"version": self.version, "entries": len(self.entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,84 @@
+import heapq
+import threading
+from bisect import bisect_left
+from apps.api.models import CryptoCurrency
+from apps.api.services import PRICE_QUANTUM
+from apps.api.versioning import current_version
+
+SEARCH_FIELDS = ["symbol", "name", "price_usd", "market_cap", "percent_change_24h"]
+
+# Queries this short match a large share of the index, so their results are memoized
+MEMO_MAX_LENGTH = 2
+
+
+class SearchIndex:
+    """
+    Prefix index over coin symbols, names and the words of each name, for one ingest version.
+
+    Keys live in one sorted array, so a query is a bisect to the first key with
+    that prefix and a walk over the matching run. Coins are stored in market cap
+    order, so a coin's position doubles as its rank.
+    """
+
+    def __init__(self, version, coins):
+        self.version = version
+        self.coins = coins
+        self._memo = {}
+
+        entries = set()
+        for rank, coin in enumerate(coins):
+            name = coin["name"].lower()
+            entries.add((coin["symbol"].lower(), rank))
+            entries.add((name, rank))
+            entries.update((word, rank) for word in name.split())
+
+        entries = sorted(entries)
+        self.keys = [key for key, _ in entries]
+        self.ranks = [rank for _, rank in entries]
+
+    def search(self, query, limit):
+        """Coins with a symbol, name or name word starting with `query`; exact symbols first, then by market cap."""
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        memo_key = (query, limit)
+        if memo_key in self._memo:
+            return self._memo[memo_key]
+
+        matched = set()
+        position = bisect_left(self.keys, query)
+        while position < len(self.keys) and self.keys[position].startswith(query):
+            matched.add(self.ranks[position])
+            position += 1
+
+        best = heapq.nsmallest(
+            limit, matched, key=lambda rank: (self.coins[rank]["symbol"].lower() != query, rank)
+        )
+        results = [self.coins[rank] for rank in best]
+
+        if len(query) <= MEMO_MAX_LENGTH:
+            self._memo[memo_key] = results
+        return results
+
+
+_lock = threading.Lock()
+_index = None
+
+
+def get_search_index():
+    """Return this worker's SearchIndex, rebuilding it when the ingest version moves."""
+    global _index
+    version = current_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+
+    with _lock:
+        if _index is None or _index.version != version:
+            coins = list(CryptoCurrency.objects.order_by("-market_cap", "id").values(*SEARCH_FIELDS))
+            # Render prices as strings, the way the list serializer does, rather than as JSON floats
+            for coin in coins:
+                coin["price_usd"] = str(coin["price_usd"].quantize(PRICE_QUANTUM))
+            _index = SearchIndex(version, coins)
+        return _index
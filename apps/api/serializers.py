@@ -1,17 +1,69 @@
+import math
+from datetime import timedelta
+from django.conf import settings
 from rest_framework import serializers
-from apps.api.models import CryptoCurrency, ConversionHistory
-from apps.api.services import calculate_apr
+from apps.api.models import CryptoCurrency, ConversionHistory, ConversionPairStats, ConversionDailyStats, Holding, PriceAlert
+from apps.api.apr import COMPOUNDING_PERIODS, SCENARIO_MAX_VALUE, SCHEDULE_MAX_PERIODS, expand_range, log_growth, schedule_periods
+from apps.api.rates import get_price_snapshot
+from apps.api.services import PRICE_QUANTUM, calculate_apr
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """A ModelSerializer that takes an optional `fields` argument limiting the output fields."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+# USD-denominated fields and the name they are returned under in a quote currency
+QUOTED_FIELDS = {"price_usd": "price_quote", "market_cap": "market_cap_quote", "volume_24h": "volume_24h_quote"}
+
+class CryptoCurrencySerializer(DynamicFieldsModelSerializer):
+    """Adds *_quote fields when the context carries a ("EUR", units per USD) quote."""
 
-class CryptoCurrencySerializer(serializers.ModelSerializer):
     class Meta:
         model = CryptoCurrency
         fields = "__all__"
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        quote = self.context.get("quote")
+        if quote is None:
+            return data
+
+        currency, per_usd = quote
+        data["quote"] = currency
+        for field, name in QUOTED_FIELDS.items():
+            if field in data:
+                value = getattr(instance, field) * per_usd
+                data[name] = str(value.quantize(PRICE_QUANTUM)) if field == "price_usd" else int(value)
+        return data
+
 class ConversionHistorySerializer(serializers.ModelSerializer):
     class Meta:
         model = ConversionHistory
         fields = "__all__"
 
+class ConversionPairStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ConversionPairStats
+        fields = [
+            "from_currency",
+            "to_currency",
+            "conversion_count",
+            "total_amount",
+            "total_converted_amount",
+            "last_converted_at",
+        ]
+
+class ConversionDailyStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ConversionDailyStats
+        fields = ["date", "conversion_count"]
+
 class APRCalculatorSerializer(serializers.Serializer):
     crypto_symbol = serializers.CharField(max_length=10)
     principal = serializers.DecimalField(max_digits=20, decimal_places=6)
@@ -21,7 +73,7 @@ class APRCalculatorSerializer(serializers.Serializer):
     def validate_crypto_symbol(self, value):
         """Ensure the cryptocurrency symbol exists in the database."""
         value = value.upper()
-        if not CryptoCurrency.objects.filter(symbol=value).exists():
+        if get_price_snapshot().price(value) is None:
             raise serializers.ValidationError("Invalid cryptocurrency symbol")
         return value
 
@@ -32,3 +84,166 @@ class APRCalculatorSerializer(serializers.Serializer):
             self.validated_data["rate"],
             self.validated_data["time_years"],
         )
+
+
+def validate_finite(value):
+    """FloatField accepts "NaN" and "Infinity", which slip past min/max checks."""
+    if not math.isfinite(value):
+        raise serializers.ValidationError("Must be a finite number.")
+    return value
+
+class ScenarioRangeSerializer(serializers.Serializer):
+    start = serializers.FloatField(min_value=0)
+    stop = serializers.FloatField(min_value=0)
+    steps = serializers.IntegerField(min_value=1, max_value=200)
+
+    def validate(self, data):
+        if not (math.isfinite(data["start"]) and math.isfinite(data["stop"])):
+            raise serializers.ValidationError("start and stop must be finite numbers")
+        if data["start"] > data["stop"]:
+            raise serializers.ValidationError("start must not be greater than stop")
+        return expand_range(data["start"], data["stop"], data["steps"])
+
+class APRScenarioSerializer(serializers.Serializer):
+    crypto_symbol = serializers.CharField(max_length=10)
+    principal = serializers.FloatField(min_value=0, max_value=1e12)
+    rates = ScenarioRangeSerializer()
+    terms = ScenarioRangeSerializer()
+    compounding = serializers.ListField(
+        child=serializers.ChoiceField(choices=list(COMPOUNDING_PERIODS)),
+        allow_empty=False,
+        max_length=len(COMPOUNDING_PERIODS),
+        default=["annually"],
+    )
+    schedule_rate = serializers.FloatField(min_value=0, max_value=1000, required=False)
+    schedule_term = serializers.FloatField(min_value=0, max_value=100, required=False)
+
+    def validate_crypto_symbol(self, value):
+        """Ensure the cryptocurrency symbol is priced in the current snapshot."""
+        value = value.upper()
+        if get_price_snapshot().price(value) is None:
+            raise serializers.ValidationError("Invalid cryptocurrency symbol")
+        return value
+
+    def validate_principal(self, value):
+        return validate_finite(value)
+
+    def validate_schedule_rate(self, value):
+        return validate_finite(value)
+
+    def validate_schedule_term(self, value):
+        return validate_finite(value)
+
+    def validate_rates(self, value):
+        if value[-1] > 1000:
+            raise serializers.ValidationError("Rates must not exceed 1000 percent")
+        return value
+
+    def validate_terms(self, value):
+        if value[-1] > 100:
+            raise serializers.ValidationError("Terms must not exceed 100 years")
+        return value
+
+    def validate(self, data):
+        data["compounding"] = list(dict.fromkeys(data["compounding"]))
+        has_rate, has_term = "schedule_rate" in data, "schedule_term" in data
+        if has_rate != has_term:
+            raise serializers.ValidationError("schedule_rate and schedule_term must be given together")
+        if has_term:
+            periods = max(schedule_periods(data["schedule_term"], method) for method in data["compounding"])
+            if periods > SCHEDULE_MAX_PERIODS:
+                raise serializers.ValidationError(f"Schedules are limited to {SCHEDULE_MAX_PERIODS} periods")
+
+        # Growth rises with both rate and term, so the largest scenario bounds the whole grid
+        rate = max(data["rates"][-1], data.get("schedule_rate", 0))
+        term = max(data["terms"][-1], data.get("schedule_term", 0))
+        largest = max(log_growth(rate, term, method) for method in data["compounding"])
+        price = float(get_price_snapshot().price(data["crypto_symbol"]) or 0)
+        principal = data["principal"] * max(price, 1.0)
+        if principal and math.log(principal) + largest >= math.log(SCENARIO_MAX_VALUE):
+            raise serializers.ValidationError(
+                f"Scenario balances must stay below {SCENARIO_MAX_VALUE:g}; lower the principal, rates or terms"
+            )
+        return data
+
+RANGE_UNIT_SECONDS = {"h": 3600, "d": 86400, "w": 604800, "m": 2592000, "y": 31536000}
+
+class ChartQuerySerializer(serializers.Serializer):
+    range = serializers.RegexField(r"^[1-9]\d{0,3}[hdwmy]$", default="7d")
+    points = serializers.IntegerField(min_value=3, max_value=1000, default=300)
+
+    def validate_range(self, value):
+        """Convert a range such as 24h, 7d or 1y into a timedelta of at most CHART_MAX_RANGE_DAYS."""
+        span = timedelta(seconds=int(value[:-1]) * RANGE_UNIT_SECONDS[value[-1]])
+        if span > timedelta(days=settings.CHART_MAX_RANGE_DAYS):
+            raise serializers.ValidationError(f"Ranges are limited to {settings.CHART_MAX_RANGE_DAYS} days")
+        return span
+
+class ChangesQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(min_value=0, default=0)
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=50, trim_whitespace=True)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+class PortfolioQuerySerializer(serializers.Serializer):
+    quote = serializers.CharField(max_length=10, default="USD")
+
+    def validate_quote(self, value):
+        return value.upper()
+
+class PortfolioHistoryQuerySerializer(ChartQuerySerializer, PortfolioQuerySerializer):
+    pass
+
+class ConversionHistoryFilterSerializer(serializers.Serializer):
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    from_currency = serializers.CharField(max_length=10, required=False)
+    to_currency = serializers.CharField(max_length=10, required=False)
+
+    def validate(self, data):
+        if "since" in data and "until" in data and data["since"] > data["until"]:
+            raise serializers.ValidationError("since must not be later than until")
+        return data
+
+class SymbolField(serializers.SlugRelatedField):
+    """A CryptoCurrency referenced by its symbol, case-insensitively."""
+
+    def to_internal_value(self, data):
+        return super().to_internal_value(str(data).upper())
+
+class HoldingSerializer(serializers.ModelSerializer):
+    symbol = SymbolField(source="coin", slug_field="symbol", queryset=CryptoCurrency.objects.all())
+    amount = serializers.DecimalField(max_digits=20, decimal_places=8, min_value=0, max_value=10**12)
+
+    class Meta:
+        model = Holding
+        fields = ["symbol", "amount", "updated_at"]
+        read_only_fields = ["updated_at"]
+
+    def create(self, validated_data):
+        """Adding a coin that is already held replaces its amount."""
+        holding, _ = Holding.objects.update_or_create(
+            user=validated_data["user"],
+            coin=validated_data["coin"],
+            defaults={"amount": validated_data["amount"]},
+        )
+        return holding
+
+    def update(self, instance, validated_data):
+        # The coin identifies the holding and cannot be changed
+        validated_data.pop("coin", None)
+        return super().update(instance, validated_data)
+
+class PriceAlertSerializer(serializers.ModelSerializer):
+    symbol = SymbolField(source="coin", slug_field="symbol", queryset=CryptoCurrency.objects.all())
+
+    class Meta:
+        model = PriceAlert
+        fields = ["id", "symbol", "kind", "threshold", "active", "created_at", "triggered_at"]
+        read_only_fields = ["created_at", "triggered_at"]
+
+    def update(self, instance, validated_data):
+        # Move an alert to another coin by creating a new one instead
+        validated_data.pop("coin", None)
+        return super().update(instance, validated_data)
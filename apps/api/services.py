@@ -1,115 +1,305 @@
 import requests
 import logging
-from apps.api.models import CryptoCurrency
-from decimal import Decimal
+from typing import NamedTuple
+from apps.api.alerts import evaluate_alerts
+from apps.api.models import CryptoCurrency, ConversionHistory, FxRate, TrackedCoin
+from apps.api.fetcher import get_fetcher
+from apps.api.history import record_ticks
+from apps.api.rates import get_price_snapshot
+from apps.api.stats import apply_conversion_stats
+from apps.api.versioning import record_ingest
+from apps.api.writebehind import WriteBehindBuffer
+import threading
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
 
 # Logger setup
 logger = logging.getLogger(__name__)
 
-# Third-party API URL (CoinGecko example)
-API_URL = "https://api.coingecko.com/api/v3/coins/markets"
-
-# List of cryptocurrencies to update
-CRYPTO_SYMBOLS = [
-    "BTC",
-    "ETH",
-    "USDT",
-    "BNB",
-    "SOL",
-    "XRP",
-    "ADA",
-    "DOGE",
-    "MATIC",
-    "DOT",
-    "AVAX",
-    "TRX",
-    "LTC",
-    "SHIB",
-    "WBTC",
+
+def load_universe():
+    """Return the enabled coin universe as an upstream id -> symbol mapping."""
+    return dict(
+        TrackedCoin.objects.filter(enabled=True).values_list("coingecko_id", "symbol")
+    )
+
+
+# Maximum number of rows written per bulk query
+INGEST_BATCH_SIZE = 500
+
+PRICE_QUANTUM = Decimal("1e-8")
+
+MARKET_FIELDS = [
+    "price_usd",
+    "market_cap",
+    "volume_24h",
+    "percent_change_24h",
+    "circulating_supply",
 ]
 
-symbol_to_id = {
-    "BTC": "bitcoin",
-    "ETH": "ethereum",
-    "USDT": "tether",
-    "BNB": "binancecoin",
-    "SOL": "solana",
-    "XRP": "ripple",
-    "ADA": "cardano",
-    "DOGE": "dogecoin",
-    "MATIC": "matic-network",
-    "DOT": "polkadot",
-    "AVAX": "avalanche-2",
-    "TRX": "tron",
-    "LTC": "litecoin",
-    "SHIB": "shiba-inu",
-    "WBTC": "wrapped-bitcoin",
+
+class IngestResult(NamedTuple):
+    changed: list
+    unchanged: list
+
+
+# CryptoCurrency field -> (/coins/markets key, conversion to the stored type)
+MARKET_SOURCES = {
+    "price_usd": ("current_price", lambda value: Decimal(str(value)).quantize(PRICE_QUANTUM)),
+    "market_cap": ("market_cap", int),
+    "volume_24h": ("total_volume", int),
+    "percent_change_24h": ("price_change_percentage_24h", float),
+    "circulating_supply": ("circulating_supply", int),
 }
 
 
-def get_crypto_data():
+def _market_values(coin):
     """
-    Fetch cryptocurrency prices from API and update the database.
-    Returns a list of updated cryptocurrency symbols.
+    Map a /coins/markets entry onto CryptoCurrency field values,
+    normalized to what the database stores so they compare equal on re-read.
+    Fields upstream sends as null are left out, so the stored value is kept;
+    returns None when the price itself is null, as the entry carries no data.
     """
-    params = {
-        "vs_currency": "usd",
-        "ids": ",".join(symbol_to_id.values()),
-        "order": "market_cap_desc",
-        "per_page": len(CRYPTO_SYMBOLS),
-        "page": 1,
-        "sparkline": False,
+    if coin.get("current_price") is None:
+        return None
+    return {
+        field: convert(coin[key])
+        for field, (key, convert) in MARKET_SOURCES.items()
+        if coin.get(key) is not None
     }
 
-    try:
-        response = requests.get(API_URL, params=params, timeout=10)
-        response.raise_for_status()
-        crypto_data = response.json()
 
-        updated_symbols = []
+def ingest_market_data(crypto_data, id_map, create_missing=False, batch_size=INGEST_BATCH_SIZE):
+    """
+    Write a /coins/markets payload to the database in bulk.
+
+    All target rows are loaded with a single query and diffed field by field
+    against the payload. Only rows that actually changed are written back, as
+    INSERT ... ON CONFLICT upserts in batches of `batch_size`, so unchanged
+    rows keep their last_updated, and get a price tick in the history store.
+    Any change bumps the ingest version and, once committed, is checked
+    against price alerts. Coins without a row are skipped
+    unless `create_missing` is set; coins upstream sends a null price for
+    are skipped and keep their stored row.
+    Returns an IngestResult of changed and unchanged symbols.
+    """
+    incoming = {}
+    for coin in crypto_data:
+        symbol = id_map.get(coin["id"])
+        if symbol:
+            incoming[symbol] = coin
+
+    if not incoming:
+        return IngestResult([], [])
 
-        with transaction.atomic():
-            for coin in crypto_data:
-                symbol_upper = next(
-                    (key for key, val in symbol_to_id.items() if val == coin["id"]),
-                    None,
-                )
+    now = timezone.now()
+    to_write = []
+    unchanged = []
+    moves = {}
 
-                if not symbol_upper:
+    with transaction.atomic():
+        existing = CryptoCurrency.objects.in_bulk(list(incoming), field_name="symbol")
+
+        for symbol, coin in incoming.items():
+            values = _market_values(coin)
+            if values is None:
+                logger.warning(f"Skipping {symbol}: Upstream sent no price")
+                continue
+            crypto = existing.get(symbol)
+
+            if crypto is None:
+                if not create_missing:
+                    logger.warning(f"Skipping {symbol}: Not found in DB")
                     continue
+                crypto = CryptoCurrency(symbol=symbol, name=coin.get("name", symbol)[:50])
+            elif all(getattr(crypto, field) == value for field, value in values.items()):
+                unchanged.append(symbol)
+                continue
+            else:
+                moves[crypto.pk] = {
+                    "price": (float(crypto.price_usd), float(values["price_usd"])),
+                    "change": (crypto.percent_change_24h, values.get("percent_change_24h", crypto.percent_change_24h)),
+                }
+
+            for field, value in values.items():
+                setattr(crypto, field, value)
+            crypto.last_updated = now
+            to_write.append(crypto)
+
+        CryptoCurrency.objects.bulk_create(
+            to_write,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["symbol"],
+            update_fields=MARKET_FIELDS + ["last_updated"],
+        )
+        record_ticks(to_write, now)
+        if to_write:
+            record_ingest([crypto.symbol for crypto in to_write])
+        if moves:
+            transaction.on_commit(lambda: evaluate_alerts(moves), robust=True)
+
+    return IngestResult([crypto.symbol for crypto in to_write], unchanged)
+
+
+def fetch_market_data(universe):
+    """
+    Fetch the /coins/markets payload for every coin in `universe`.
+    Raises requests.RequestException on upstream failure.
+    """
+    return get_fetcher().fetch_ids(universe)
+
+
+def update_prices():
+    """
+    Fetch the enabled coin universe and FX rates from the API and ingest both.
+    Prices and rates are written in one transaction, so an FX change that
+    comes with price changes shares their ingest version instead of adding one.
+    Raises requests.RequestException on upstream failure.
+    Returns an IngestResult of changed and unchanged symbols.
+    """
+    universe = load_universe()
+    crypto_data = fetch_market_data(universe)
+    fx_rates = fetch_fx_rates()
+
+    with transaction.atomic():
+        result = ingest_market_data(crypto_data, universe, create_missing=True)
+        if fx_rates:
+            store_fx_rates(fx_rates, bump_version=not result.changed)
+    return result
+
+
+def store_fx_rates(rates, bump_version=True):
+    """
+    Upsert {currency: units per USD} into the FX table.
 
-                try:
-                    crypto = CryptoCurrency.objects.get(symbol=symbol_upper)
+    Rates derived from live quotes wobble on every refresh, so a rate only
+    counts as moved when it differs from the stored one by more than
+    CRYPTO_FX_TOLERANCE (relative). Moved rates are written and, with
+    `bump_version`, bump the ingest version so price-derived caches reload;
+    callers that record an ingest in the same transaction pass False.
+    Returns the currencies whose rate changed.
+    """
+    rates = {currency: rate.quantize(PRICE_QUANTUM) for currency, rate in rates.items()}
+    tolerance = Decimal(str(settings.CRYPTO_FX_TOLERANCE))
 
-                    # Update fields
-                    crypto.price_usd = Decimal(str(coin["current_price"]))
-                    crypto.market_cap = coin["market_cap"]
-                    crypto.volume_24h = coin["total_volume"]
-                    crypto.percent_change_24h = Decimal(
-                        str(coin["price_change_percentage_24h"])
-                    )
-                    crypto.circulating_supply = coin["circulating_supply"]
+    with transaction.atomic():
+        existing = dict(FxRate.objects.values_list("currency", "per_usd"))
+        changed = [
+            FxRate(currency=currency, per_usd=rate)
+            for currency, rate in rates.items()
+            if not existing.get(currency) or abs(rate - existing[currency]) > existing[currency] * tolerance
+        ]
+        if changed:
+            FxRate.objects.bulk_create(
+                changed,
+                update_conflicts=True,
+                unique_fields=["currency"],
+                update_fields=["per_usd", "updated_at"],
+            )
+            if bump_version:
+                record_ingest([])
 
-                    crypto.save()
-                    updated_symbols.append(symbol_upper)
+    return [fx.currency for fx in changed]
 
-                except CryptoCurrency.DoesNotExist:
-                    logger.warning(f"Skipping {symbol_upper}: Not found in DB")
 
-        logger.info(f"Updated cryptocurrencies: {updated_symbols}")
-        return updated_symbols
+def fetch_fx_rates():
+    """
+    Fetch rates for CRYPTO_QUOTE_CURRENCIES with one upstream call.
+    Returns None when none are configured or the fetch failed; the previous table is kept.
+    """
+    if not settings.CRYPTO_QUOTE_CURRENCIES:
+        return None
+
+    try:
+        return get_fetcher().fetch_fx(settings.CRYPTO_QUOTE_CURRENCIES)
+    except (requests.RequestException, KeyError, ValueError, ArithmeticError) as e:
+        logger.warning(f"Keeping previous FX rates, fetch failed: {e}")
+        return None
+
+
+def get_crypto_data():
+    """
+    Fetch cryptocurrency prices from API and update the database.
+    Returns a list of updated cryptocurrency symbols.
+    """
+    try:
+        result = update_prices()
+
+        logger.info(f"Updated {len(result.changed)} cryptocurrencies, {len(result.unchanged)} unchanged")
+        return result.changed
 
     except requests.RequestException as e:
         logger.error(f"Error fetching crypto data: {e}")
         return []
 
 
+_history_buffer = None
+_history_buffer_lock = threading.Lock()
+
+
+def get_history_buffer():
+    """Return the process-wide write-behind buffer for ConversionHistory rows."""
+    global _history_buffer
+    with _history_buffer_lock:
+        if _history_buffer is None:
+            _history_buffer = WriteBehindBuffer(
+                ConversionHistory,
+                max_size=settings.CONVERSION_HISTORY_FLUSH_SIZE,
+                max_delay=settings.CONVERSION_HISTORY_FLUSH_INTERVAL,
+                on_flush=apply_conversion_stats,
+            )
+        return _history_buffer
+
+
+# ConversionHistory amounts are stored with 20 digits, 8 of them decimal places
+MAX_STORED_AMOUNT = Decimal("1e12")
+
+
+def parse_amount(value):
+    """Parse a conversion amount into a finite Decimal, or return None."""
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return amount if amount.is_finite() else None
+
+
+def convert_amount(amount, conversion_rate):
+    """
+    Convert `amount` at `conversion_rate`, or return None when the amount, rate
+    or result would not fit a ConversionHistory row. Check this before
+    queueing a row: the write-behind insert would reject it much later.
+    """
+    converted_amount = amount * conversion_rate
+    if max(abs(amount), abs(conversion_rate), abs(converted_amount)) >= MAX_STORED_AMOUNT:
+        return None
+    return converted_amount
+
+
+def record_conversions(entries):
+    """
+    Persist unsaved ConversionHistory entries and fold them into the per-user stats.
+    With CONVERSION_HISTORY_WRITE_BEHIND they are queued and inserted in the
+    background instead of on the request path.
+    """
+    if settings.CONVERSION_HISTORY_WRITE_BEHIND:
+        get_history_buffer().add(entries)
+        return
+
+    with transaction.atomic():
+        ConversionHistory.objects.bulk_create(entries)
+        apply_conversion_stats(entries)
+
+
 def calculate_apr(crypto_symbol, principal, rate, time_years):
     """Perform the APR calculation logic."""
 
-    crypto = CryptoCurrency.objects.get(symbol=crypto_symbol)
-    crypto_price = Decimal(crypto.price_usd)
+    crypto_price = get_price_snapshot().price(crypto_symbol)
+    if crypto_price is None:
+        raise CryptoCurrency.DoesNotExist(f"No price for {crypto_symbol}")
 
     principal_in_usd = principal * crypto_price
     total_amount_in_usd = principal_in_usd * (1 + (rate / Decimal(100)) * time_years)
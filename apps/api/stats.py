@@ -0,0 +1,77 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import Greatest, TruncDate
+from apps.api.models import ConversionDailyStats, ConversionHistory, ConversionPairStats
+
+
+def _increment(model, keys, increments, extra_updates=None, extra_initial=None):
+    """
+    Add `increments` to the stats row identified by `keys`, creating it if needed.
+    Increments run as UPDATE ... SET col = col + n, so concurrent writers never lose counts.
+    """
+    updates = {field: F(field) + value for field, value in increments.items()}
+    updates.update(extra_updates or {})
+
+    with transaction.atomic():
+        if model.objects.filter(**keys).update(**updates):
+            return
+        try:
+            with transaction.atomic():
+                model.objects.create(**keys, **increments, **(extra_initial or {}))
+        except IntegrityError:
+            # Another writer created the row first
+            model.objects.filter(**keys).update(**updates)
+
+
+def apply_conversion_stats(entries):
+    """
+    Fold saved ConversionHistory entries into the per-user summaries.
+    Costs one or two queries per distinct (user, pair) and (user, day), not per entry.
+    """
+    pairs = defaultdict(lambda: {"count": 0, "amount": Decimal(0), "converted": Decimal(0), "last": None})
+    days = defaultdict(int)
+
+    for entry in entries:
+        pair = pairs[(entry.user_id, entry.from_currency, entry.to_currency)]
+        pair["count"] += 1
+        pair["amount"] += entry.amount
+        pair["converted"] += entry.converted_amount
+        pair["last"] = max(pair["last"] or entry.timestamp, entry.timestamp)
+        days[(entry.user_id, entry.timestamp.date())] += 1
+
+    for (user_id, from_currency, to_currency), pair in pairs.items():
+        _increment(
+            ConversionPairStats,
+            {"user_id": user_id, "from_currency": from_currency, "to_currency": to_currency},
+            {
+                "conversion_count": pair["count"],
+                "total_amount": pair["amount"],
+                "total_converted_amount": pair["converted"],
+            },
+            extra_updates={"last_converted_at": Greatest(F("last_converted_at"), pair["last"])},
+            extra_initial={"last_converted_at": pair["last"]},
+        )
+
+    for (user_id, date), count in days.items():
+        _increment(ConversionDailyStats, {"user_id": user_id, "date": date}, {"conversion_count": count})
+
+
+def rebuild_conversion_stats(user_ids):
+    """Recompute the summaries of the given users from their full ConversionHistory."""
+    for user_id in user_ids:
+        history = ConversionHistory.objects.filter(user_id=user_id)
+        pairs = history.values("from_currency", "to_currency").annotate(
+            conversion_count=Count("id"),
+            total_amount=Sum("amount"),
+            total_converted_amount=Sum("converted_amount"),
+            last_converted_at=Max("timestamp"),
+        )
+        days = history.annotate(date=TruncDate("timestamp")).values("date").annotate(conversion_count=Count("id"))
+
+        with transaction.atomic():
+            ConversionPairStats.objects.filter(user_id=user_id).delete()
+            ConversionDailyStats.objects.filter(user_id=user_id).delete()
+            ConversionPairStats.objects.bulk_create([ConversionPairStats(user_id=user_id, **pair) for pair in pairs])
+            ConversionDailyStats.objects.bulk_create([ConversionDailyStats(user_id=user_id, **day) for day in days])
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connection
+from apps.api.models import CryptoCurrency, IngestVersion
+from apps.api.services import MARKET_FIELDS
+from apps.api.versioning import current_version
+
+logger = logging.getLogger(__name__)
+
+# Queued in place of deltas when a subscriber fell behind and needs a fresh snapshot
+RESYNC = object()
+
+
+def encode_event(event, version, rows):
+    """Encode one Server-Sent Event carrying {symbol: market fields} rows."""
+    data = json.dumps({"version": version, "prices": rows}, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return f"id: {version}\nevent: {event}\ndata: {data}\n\n".encode()
+
+
+def load_rows(symbols=None):
+    """Return {symbol: market fields} for the given symbols, or for every coin."""
+    queryset = CryptoCurrency.objects.all()
+    if symbols is not None:
+        queryset = queryset.filter(symbol__in=symbols)
+    return {row.pop("symbol"): row for row in queryset.values("symbol", *MARKET_FIELDS)}
+
+
+class Subscription:
+    """One connected client: the symbols it wants (None for all) and its event queue."""
+
+    def __init__(self, symbols, loop):
+        self.symbols = frozenset(symbols) if symbols else None
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=settings.CRYPTO_STREAM_QUEUE_SIZE)
+
+    def snapshot(self):
+        """Encode the current rows for this subscription; call from sync code."""
+        return encode_event("snapshot", current_version(), load_rows(self.symbols))
+
+
+class PriceBroadcaster:
+    """
+    Fan price deltas out to every subscriber in the process.
+
+    A single background thread watches the ingest version and, when it moves,
+    loads only the changed rows once and encodes each distinct message once.
+    Idle subscribers are just a queue waiting on their event loop.
+    """
+
+    def __init__(self, poll_interval):
+        self.poll_interval = poll_interval
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.version = None
+        self.broadcasts = 0
+        self.resyncs = 0
+
+    def subscribe(self, symbols):
+        subscription = Subscription(symbols, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(subscription.loop, set()).add(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="price-stream", daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.loop)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.loop]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def _changed_symbols(self, since, until):
+        symbols = set()
+        for changed in IngestVersion.objects.filter(pk__gt=since, pk__lte=until).values_list(
+            "changed_symbols", flat=True
+        ):
+            symbols.update(changed)
+        return symbols
+
+    def _fanout(self, subscribers, version, rows, full_message):
+        """Deliver one ingest's deltas on the subscribers' own event loop."""
+        messages = {None: full_message}
+        for subscription in list(subscribers):
+            key = subscription.symbols
+            if key not in messages:
+                picked = {symbol: rows[symbol] for symbol in key if symbol in rows}
+                messages[key] = encode_event("prices", version, picked) if picked else None
+
+            message = messages[key]
+            if message is None:
+                continue
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow client: drop what it has not read and send a snapshot instead
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(RESYNC)
+                self.resyncs += 1
+
+    def _broadcast(self, version):
+        symbols = self._changed_symbols(self.version, version)
+        self.version = version
+        if not symbols:
+            return
+
+        rows = load_rows(symbols)
+        full_message = encode_event("prices", version, rows)
+        with self._lock:
+            targets = [(loop, set(subscribers)) for loop, subscribers in self._subscribers.items()]
+
+        for loop, subscribers in targets:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self._fanout, subscribers, version, rows, full_message)
+        self.broadcasts += 1
+        logger.debug(f"Streamed {len(rows)} changed prices at version {version}")
+
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._subscribers:
+                        # Nobody listening; the next subscribe starts a fresh thread
+                        self._thread = None
+                        self.version = None
+                        return
+
+                close_old_connections()
+                try:
+                    version = current_version()
+                    if self.version is None:
+                        self.version = version
+                    elif version > self.version:
+                        self._broadcast(version)
+                except Exception:
+                    logger.exception("Price stream poll failed")
+
+                time.sleep(self.poll_interval)
+        finally:
+            connection.close()
+
+    def stats(self):
+        return {
+            "subscribers": self.subscriber_count(),
+            "version": self.version,
+            "broadcasts": self.broadcasts,
+            "resyncs": self.resyncs,
+        }
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_broadcaster():
+    """Return the process-wide broadcaster shared by all stream connections."""
+    global _broadcaster
+    with _broadcaster_lock:
+        if _broadcaster is None:
+            _broadcaster = PriceBroadcaster(settings.CRYPTO_STREAM_POLL_INTERVAL)
+        return _broadcaster
@@ -0,0 +1,106 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def canned_coins(count):
+    """Deterministic /coins/markets entries for `count` coins, ordered by market cap."""
+    return [
+        {
+            "id": f"stub-coin-{i}",
+            "symbol": f"sc{i}",
+            "name": f"Stub Coin {i}",
+            "current_price": round(1000 / (i + 1), 8),
+            "market_cap": (count - i) * 1_000_000,
+            "total_volume": (count - i) * 10_000,
+            "price_change_percentage_24h": round((i % 21 - 10) / 10, 2),
+            "circulating_supply": 1_000_000 + i,
+        }
+        for i in range(count)
+    ]
+
+
+# Units of each fiat currency per US dollar served by /simple/price
+CANNED_FX = {"usd": 1, "eur": 0.92, "gbp": 0.79, "jpy": 151.3, "chf": 0.88, "cad": 1.37, "aud": 1.52}
+
+
+class StubMarketHandler(BaseHTTPRequestHandler):
+    """
+    Serve canned /coins/markets pages, honouring the ids, per_page and page
+    parameters, and bitcoin quotes from /simple/price.
+
+    For exercising the fetcher's error handling, the first `rate_limited`
+    requests are answered 429 with a Retry-After of `retry_after` seconds,
+    and with `error_status` set every market request fails with it.
+    Served market queries are logged to `requests`.
+    """
+
+    protocol_version = "HTTP/1.1"
+    coins = []
+    rate_limited = 0
+    retry_after = 0
+    error_status = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        with self.lock:
+            throttled = self.rate_limited > 0
+            if throttled:
+                type(self).rate_limited -= 1
+            elif not url.path.endswith("/simple/price"):
+                self.requests.append(query)
+        if throttled:
+            return self._send_json({"error": "rate limited"}, 429, {"Retry-After": str(self.retry_after)})
+        if url.path.endswith("/simple/price"):
+            return self._send_json(self._simple_price(query))
+        if self.error_status:
+            return self._send_json({"error": "upstream failure"}, self.error_status)
+
+        coins = self.coins
+
+        if "ids" in query:
+            wanted = set(query["ids"][0].split(","))
+            coins = [coin for coin in coins if coin["id"] in wanted]
+
+        per_page = int(query.get("per_page", ["100"])[0])
+        page = int(query.get("page", ["1"])[0])
+        self._send_json(coins[(page - 1) * per_page:page * per_page])
+
+    def _simple_price(self, query):
+        currencies = query.get("vs_currencies", ["usd"])[0].split(",")
+        return {
+            coin_id: {currency: 68000 * CANNED_FX[currency] for currency in currencies if currency in CANNED_FX}
+            for coin_id in query.get("ids", [""])[0].split(",")
+        }
+
+    def _send_json(self, data, status=200, headers=None):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_stub_server(host="127.0.0.1", port=0, coins=None, rate_limited=0, retry_after=0, error_status=None):
+    """
+    Build a threaded stub server; port 0 picks a free port (see server.server_port).
+    The handler class, with its request log, is server.RequestHandlerClass.
+    """
+    handler = type("Handler", (StubMarketHandler,), {
+        "coins": coins if coins is not None else canned_coins(1000),
+        "rate_limited": rate_limited,
+        "retry_after": retry_after,
+        "error_status": error_status,
+        "requests": [],
+        "lock": threading.Lock(),
+    })
+    return ThreadingHTTPServer((host, port), handler)
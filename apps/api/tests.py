@@ -1,3 +1,989 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+import requests
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.api import alerts, rates, search, versioning, views
+from apps.api.charts import RAW_TIER, chart_series, load_chart_series, select_tier
+from apps.api.fetcher import MarketFetcher, TokenBucket
+from apps.api.history import TIERS, prune_history, rebuild_rollups, record_ticks
+from apps.api.models import (
+    ConversionDailyStats, ConversionHistory, ConversionPairStats, CryptoCurrency, FxRate, IngestVersion, PriceAlert,
+    PriceRefresh, PriceRollup, PriceTick,
+)
+from apps.api.importer import import_history
+from apps.api.portfolio import portfolio_history
+from apps.api.refresh import REFRESH_LOCK_NAME, acquire_lock, refresh_prices
+from apps.api.services import (
+    MAX_STORED_AMOUNT, convert_amount, ingest_market_data, parse_amount, record_conversions, store_fx_rates,
+    update_prices,
+)
+from apps.api.stream import RESYNC, PriceBroadcaster
+from apps.api.stub_server import canned_coins, make_stub_server
+from apps.api.writebehind import WriteBehindBuffer
+from config.middleware import LeanAuthenticationMiddleware, LeanSessionMiddleware
 
-# Create your tests here.
+
+def api_client(user):
+    """An API client authenticated the way the frontend is, with the JWT access cookie."""
+    client = APIClient()
+    client.cookies["access_token"] = str(RefreshToken.for_user(user).access_token)
+    return client
+
+
+def publish_prices(**prices):
+    """Store {symbol: USD price} as a new ingest and make it this process's price snapshot."""
+    for symbol, price in prices.items():
+        CryptoCurrency.objects.update_or_create(
+            symbol=symbol, defaults={"name": symbol.title(), "price_usd": Decimal(str(price)), "market_cap": 1}
+        )
+    versioning.record_ingest(prices)
+    # Test transactions never commit, so drop the per-process caches instead of waiting on on_commit
+    versioning._state.update(version=None, created_at=None, checked_at=0.0)
+    rates._snapshot = None
+    # Rolled-back versions get their numbers reused, so version-keyed caches must go too
+    search._index = None
+    views.response_cache.version = None
+
+
+def conversion(user_id, amount=1):
+    return ConversionHistory(
+        user_id=user_id,
+        from_currency="BTC",
+        to_currency="ETH",
+        amount=amount,
+        converted_amount=amount,
+        conversion_rate=1,
+    )
+
+
+class WriteBehindBufferTests(TransactionTestCase):
+    # Foreign keys are only checked when the insert transaction really commits
+
+    def setUp(self):
+        self.user = User.objects.create(username="buffer")
+        ghost = User.objects.create(username="ghost")
+        self.ghost_id = ghost.pk
+        ghost.delete()
+        self.buffer = WriteBehindBuffer(ConversionHistory, max_delay=3600)
+        # Flush by hand instead of from the background thread
+        self.buffer._thread = object()
+
+    def test_bad_row_is_dead_lettered_and_the_rest_written(self):
+        self.buffer.add([conversion(self.user.pk), conversion(self.ghost_id), conversion(self.user.pk)])
+
+        with self.assertLogs("apps.api.writebehind", level="ERROR"):
+            self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(self.buffer.depth(), 0)
+        self.assertEqual(self.buffer.stats()["dead_lettered"], 1)
+        self.assertEqual(ConversionHistory.objects.filter(user=self.user).count(), 2)
+
+    def test_later_flushes_are_not_blocked(self):
+        self.buffer.add([conversion(self.ghost_id)])
+        with self.assertLogs("apps.api.writebehind", level="ERROR"):
+            self.buffer.flush()
+
+        self.buffer.add([conversion(self.user.pk)])
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.buffer.depth(), 0)
+
+
+class ConversionAmountTests(TestCase):
+    def setUp(self):
+        self.client = api_client(User.objects.create(username="converter"))
+        publish_prices(BTC=68000, ETH=3500)
+
+    def test_parse_amount_rejects_non_finite_values(self):
+        for value in ["abc", "NaN", "Infinity", None]:
+            self.assertIsNone(parse_amount(value))
+        self.assertEqual(parse_amount("1.5"), Decimal("1.5"))
+
+    def test_convert_amount_rejects_unstorable_results(self):
+        self.assertIsNone(convert_amount(MAX_STORED_AMOUNT, Decimal(1)))
+        self.assertIsNone(convert_amount(Decimal(1), MAX_STORED_AMOUNT))
+        self.assertEqual(convert_amount(Decimal(2), Decimal(3)), Decimal(6))
+
+    def test_single_conversion_rejects_too_large_amount(self):
+        response = self.client.post(
+            "/api/crypto-conversion/",
+            {"from_currency": "BTC", "to_currency": "ETH", "amount": "1e20"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Amount is too large."})
+
+    def test_single_conversion_rejects_invalid_amount(self):
+        response = self.client.post(
+            "/api/crypto-conversion/",
+            {"from_currency": "BTC", "to_currency": "ETH", "amount": "abc"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class BatchConversionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="batcher")
+        self.client = api_client(self.user)
+        publish_prices(BTC=68000, ETH=3400)
+
+    def test_invalid_items_fail_alone(self):
+        items = [
+            {"from_currency": "btc", "to_currency": "eth", "amount": "1"},
+            {"from_currency": "BTC", "to_currency": "NOPE", "amount": "1"},
+            {"from_currency": "BTC", "to_currency": "ETH", "amount": "abc"},
+            "not an object",
+            {"from_currency": "ETH", "to_currency": "BTC", "amount": "10"},
+        ]
+
+        response = self.client.post("/api/crypto-conversion/batch/", {"items": items}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([result["index"] for result in results], [0, 1, 2, 3, 4])
+        self.assertEqual([("error" in result) for result in results], [False, True, True, True, False])
+        self.assertEqual((results[0]["converted_amount"], results[4]["converted_amount"]), (20.0, 0.5))
+        self.assertEqual(ConversionHistory.objects.filter(user=self.user).count(), 2)
+
+    @override_settings(CONVERSION_BATCH_MAX_ITEMS=2)
+    def test_oversized_batches_are_rejected(self):
+        items = [{"from_currency": "BTC", "to_currency": "ETH", "amount": "1"}] * 3
+
+        response = self.client.post("/api/crypto-conversion/batch/", {"items": items}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ConversionHistory.objects.exists())
+
+
+class ConversionHistoryPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="historian")
+        self.client = api_client(self.user)
+        ConversionHistory.objects.bulk_create(conversion(self.user.pk) for _ in range(7))
+        # Identical timestamps, so only the id tiebreak orders the rows
+        ConversionHistory.objects.update(timestamp=timezone.now() - timedelta(hours=1))
+
+    def walk(self, url, on_page=None):
+        ids = []
+        while url:
+            body = self.client.get(url).json()
+            ids.extend(row["id"] for row in body["results"])
+            if on_page:
+                on_page()
+            url = body["next"]
+        return ids
+
+    def test_tied_timestamps_page_without_repeats_or_gaps(self):
+        expected = list(ConversionHistory.objects.order_by("-id").values_list("id", flat=True))
+        self.assertEqual(self.walk("/api/conversion-history/?limit=3"), expected)
+
+    def test_new_rows_do_not_shift_later_pages(self):
+        expected = list(ConversionHistory.objects.order_by("-id").values_list("id", flat=True))
+
+        ids = self.walk("/api/conversion-history/?limit=3", on_page=lambda: conversion(self.user.pk).save())
+
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_the_page_before(self):
+        first = self.client.get("/api/conversion-history/?limit=3").json()
+        second = self.client.get(first["next"]).json()
+        third = self.client.get(second["next"]).json()
+
+        back = self.client.get(third["previous"]).json()
+
+        self.assertEqual(back["results"], second["results"])
+        self.assertEqual(self.client.get(back["previous"]).json()["results"], first["results"])
+
+    def test_malformed_cursor_is_not_found(self):
+        cursor = base64.b64encode(b"p=not-a-time%7Cx").decode()
+        self.assertEqual(self.client.get(f"/api/conversion-history/?cursor={cursor}").status_code, 404)
+
+
+class ConversionStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="tallier")
+
+    def stats(self):
+        pairs = ConversionPairStats.objects.filter(user=self.user).order_by("from_currency", "to_currency")
+        days = ConversionDailyStats.objects.filter(user=self.user).order_by("date")
+        columns = ["from_currency", "to_currency", "conversion_count", "total_amount", "last_converted_at"]
+        return list(pairs.values_list(*columns)), list(days.values_list("date", "conversion_count"))
+
+    def test_rebuild_reproduces_the_incremental_stats(self):
+        record_conversions([conversion(self.user.pk, amount=2), conversion(self.user.pk, amount=3)])
+        swapped = conversion(self.user.pk, amount=5)
+        swapped.from_currency, swapped.to_currency = "ETH", "BTC"
+        record_conversions([swapped])
+        incremental = self.stats()
+        self.assertEqual([pair[2:4] for pair in incremental[0]], [(2, 5), (1, 5)])
+
+        ConversionPairStats.objects.filter(user=self.user).update(conversion_count=99)
+        ConversionDailyStats.objects.filter(user=self.user).delete()
+        call_command("rebuild_conversion_stats", "--user", str(self.user.pk), stdout=io.StringIO())
+
+        self.assertEqual(self.stats(), incremental)
+
+
+@override_settings(INGEST_VERSION_TTL=60)
+class PriceSnapshotTests(TestCase):
+    def setUp(self):
+        publish_prices(BTC=50000, ETH=2500)
+
+    def test_snapshot_is_reused_until_the_version_moves(self):
+        snapshot = rates.get_price_snapshot()
+        self.assertEqual(snapshot.rate("BTC", "ETH"), 20)
+
+        CryptoCurrency.objects.filter(symbol="ETH").update(price_usd=5000)
+        with self.assertNumQueries(0):
+            self.assertIs(rates.get_price_snapshot(), snapshot)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            versioning.record_ingest(["ETH"])
+
+        fresh = rates.get_price_snapshot()
+        self.assertIsNot(fresh, snapshot)
+        self.assertEqual(fresh.rate("BTC", "ETH"), 10)
+
+
+class APRScenarioTests(TestCase):
+    def setUp(self):
+        self.client = api_client(User.objects.create(username="saver"))
+        publish_prices(BTC=68000)
+
+    def scenarios(self, principal, rate, term, compounding):
+        return self.client.post(
+            "/api/apr-calculator/scenarios/",
+            {
+                "crypto_symbol": "BTC",
+                "principal": principal,
+                "rates": {"start": rate, "stop": rate, "steps": 1},
+                "terms": {"start": term, "stop": term, "steps": 1},
+                "compounding": compounding,
+            },
+            format="json",
+        )
+
+    def test_overflowing_growth_is_rejected(self):
+        for method in ["continuous", "daily"]:
+            response = self.scenarios(1, 1000, 100, [method])
+            self.assertEqual(response.status_code, 400, method)
+
+    def test_unbounded_principal_is_rejected(self):
+        self.assertEqual(self.scenarios(1e300, 5, 1, ["annually"]).status_code, 400)
+
+    def test_non_finite_inputs_are_rejected(self):
+        for principal, rate, term in [("NaN", 5, 1), (1, "NaN", 1), (1, 5, "NaN"), (1, "Infinity", 1)]:
+            with self.subTest(principal=principal, rate=rate, term=term):
+                self.assertEqual(self.scenarios(principal, rate, term, ["annually"]).status_code, 400)
+
+    def test_ordinary_scenario_is_valued(self):
+        response = self.scenarios(2, 10, 1, ["annually", "simple"])
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(response.json()["grid"]["annually"][0][0], 2.2)
+
+
+class ChartTests(TestCase):
+    def setUp(self):
+        self.client = api_client(User.objects.create(username="charter"))
+        publish_prices(BTC=68000)
+        self.coin = CryptoCurrency.objects.get(symbol="BTC")
+
+    def test_range_beyond_the_maximum_is_rejected(self):
+        response = self.client.get("/api/crypto-detail/BTC/chart/?range=3000y")
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(CHART_MAX_SOURCE_POINTS=100)
+    def test_dense_ticks_step_up_to_a_coarser_tier(self):
+        # One tick a second for ten minutes: far denser than the refresh interval suggests
+        now = timezone.now()
+        PriceTick.objects.bulk_create(
+            PriceTick(coin=self.coin, timestamp=now - timedelta(seconds=second), price_usd=68000)
+            for second in range(1, 601)
+        )
+        PriceRollup.objects.bulk_create(
+            PriceRollup(
+                coin=self.coin, tier=PriceRollup.TIER_MINUTE, bucket=now - timedelta(minutes=minute),
+                open=68000, high=68000, low=68000, close=68000,
+            )
+            for minute in range(1, 11)
+        )
+
+        self.assertEqual(select_tier(timedelta(hours=1)), RAW_TIER)
+        tier, series = load_chart_series([self.coin.pk], timedelta(hours=1))
+        self.assertEqual(tier, PriceRollup.TIER_MINUTE)
+        # Ten minute buckets plus the last price carried forward to now
+        self.assertEqual(len(series[self.coin.pk]), 11)
+
+
+class PriceRollupTests(TestCase):
+    def setUp(self):
+        publish_prices(BTC=10)
+        self.coin = CryptoCurrency.objects.get(symbol="BTC")
+        self.start = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
+
+    def tick(self, seconds, price):
+        self.coin.price_usd = Decimal(price)
+        record_ticks([self.coin], self.start + timedelta(seconds=seconds))
+
+    def ohlc(self, tier):
+        rollups = PriceRollup.objects.filter(coin=self.coin, tier=tier).order_by("bucket")
+        return [(r.open, r.high, r.low, r.close, r.tick_count) for r in rollups]
+
+    def test_ticks_fold_into_every_tier(self):
+        for seconds, price in [(0, "10"), (30, "12"), (90, "8")]:
+            self.tick(seconds, price)
+
+        self.assertEqual(self.ohlc(PriceRollup.TIER_MINUTE), [(10, 12, 10, 12, 2), (8, 8, 8, 8, 1)])
+        self.assertEqual(self.ohlc(PriceRollup.TIER_HOUR), [(10, 12, 8, 8, 3)])
+        self.assertEqual(self.ohlc(PriceRollup.TIER_DAY), [(10, 12, 8, 8, 3)])
+
+    def test_rebuild_matches_the_incremental_rollups(self):
+        for seconds, price in [(0, "10"), (30, "12"), (90, "8"), (1800, "9")]:
+            self.tick(seconds, price)
+        incremental = {tier: self.ohlc(tier) for tier in TIERS}
+        self.assertEqual(len(incremental[PriceRollup.TIER_MINUTE]), 3)
+
+        rebuild_rollups(self.start)
+
+        self.assertEqual({tier: self.ohlc(tier) for tier in TIERS}, incremental)
+
+    def test_prune_keeps_each_tier_for_its_retention(self):
+        self.tick(0, "10")
+
+        prune_history(now=self.start + timedelta(days=40))
+
+        self.assertFalse(PriceTick.objects.filter(coin=self.coin).exists())
+        self.assertEqual(self.ohlc(PriceRollup.TIER_MINUTE), [])
+        self.assertEqual(len(self.ohlc(PriceRollup.TIER_HOUR)), 1)
+        self.assertEqual(len(self.ohlc(PriceRollup.TIER_DAY)), 1)
+
+
+class QuietCoinHistoryTests(TestCase):
+    """Ticks are only stored on change, so a coin may have none inside a window."""
+
+    def setUp(self):
+        publish_prices(SC1=10, SC3=5)
+        self.coins = {coin.symbol: coin for coin in CryptoCurrency.objects.filter(symbol__in=["SC1", "SC3"])}
+        now = timezone.now()
+        PriceTick.objects.bulk_create(
+            [
+                PriceTick(coin=self.coins["SC1"], timestamp=now - timedelta(days=2), price_usd=8),
+                PriceTick(coin=self.coins["SC3"], timestamp=now - timedelta(days=2), price_usd=5),
+                PriceTick(coin=self.coins["SC1"], timestamp=now - timedelta(hours=1), price_usd=10),
+            ]
+        )
+
+    def test_chart_of_a_quiet_coin_is_flat_not_empty(self):
+        _, series = chart_series(self.coins["SC3"], timedelta(hours=24), 300)
+        self.assertEqual(len(series), 2)
+        self.assertEqual({price for _, price in series}, {5.0})
+
+    def test_portfolio_history_keeps_quiet_holdings(self):
+        _, series = portfolio_history([("SC1", 1), ("SC3", 1)], timedelta(hours=24), 300)
+        self.assertEqual([value for _, value in series], [13.0, 15.0, 15.0])
+
+    def test_portfolio_history_in_fiat_uses_the_fx_table(self):
+        FxRate.objects.create(currency="EUR", per_usd=Decimal("0.5"))
+        rates._snapshot = None
+        _, series = portfolio_history([("SC3", 2)], timedelta(hours=24), 300, quote="EUR")
+        self.assertEqual({value for _, value in series}, {5.0})
+
+    def test_unknown_quote_is_refused(self):
+        self.assertIsNone(portfolio_history([("SC3", 2)], timedelta(hours=24), 300, quote="XYZ"))
+
+
+class ImportHistoryTests(TestCase):
+    def setUp(self):
+        publish_prices(BTC=68000)
+        self.coin = CryptoCurrency.objects.get(symbol="BTC")
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "prices.csv")
+
+    def write_dump(self, rows):
+        with open(self.path, "w", newline="") as stream:
+            writer = csv.writer(stream)
+            writer.writerow(["symbol", "timestamp", "price_usd"])
+            writer.writerows(rows)
+
+    def test_records_without_a_price_are_skipped(self):
+        self.write_dump([["BTC", "2024-01-01T00:00:00", ""], ["BTC", "2024-01-01T00:01:00", "42000"]])
+        stats = import_history(self.path)
+        self.assertEqual((stats["imported"], stats["skipped"]), (1, 1))
+
+    def test_records_with_a_bad_volume_are_skipped(self):
+        with open(self.path, "w", newline="") as stream:
+            writer = csv.writer(stream)
+            writer.writerow(["symbol", "timestamp", "price_usd", "volume_24h"])
+            writer.writerows([
+                ["BTC", "2024-01-01T00:00:00", "42000", "abc"],
+                ["BTC", "2024-01-01T00:01:00", "42000", "nan"],
+                ["BTC", "2024-01-01T00:02:00", "42000", "inf"],
+                ["BTC", "2024-01-01T00:03:00", "42000", "1e30"],
+                ["BTC", "2024-01-01T00:04:00", "42000", ""],
+                ["BTC", "2024-01-01T00:05:00", "42000", "1234.5"],
+            ])
+
+        stats = import_history(self.path)
+
+        self.assertEqual((stats["imported"], stats["skipped"]), (2, 4))
+        volumes = PriceTick.objects.filter(coin=self.coin).order_by("timestamp").values_list("volume_24h", flat=True)
+        self.assertEqual(list(volumes), [0, 1234])
+
+    def test_resumed_import_rolls_up_rows_from_before_the_checkpoint(self):
+        # Rollups are rebuilt in whole days, so the first committed row sits on an earlier day
+        first_day, next_day = [(timezone.now() - timedelta(days=days)).date().isoformat() for days in (3, 2)]
+        self.write_dump([
+            ["BTC", f"{first_day}T00:00:00", "40000"],
+            ["BTC", f"{next_day}T01:00:00", "41000"],
+            ["BTC", f"{next_day}T02:00:00", "42000"],
+        ])
+
+        def interrupt(records, rate):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            import_history(self.path, batch_size=1, progress=interrupt)
+        import_history(self.path, batch_size=1)
+
+        buckets = PriceRollup.objects.filter(coin=self.coin, tier=PriceRollup.TIER_HOUR).values_list("bucket", flat=True)
+        self.assertEqual(sorted(bucket.hour for bucket in buckets), [0, 1, 2])
+
+    def test_import_keeps_rollups_whose_raw_ticks_expired(self):
+        hour = (timezone.now() - timedelta(days=10)).replace(minute=0, second=0, microsecond=0)
+        PriceRollup.objects.bulk_create(
+            PriceRollup(
+                coin=self.coin, tier=PriceRollup.TIER_MINUTE, bucket=hour + timedelta(minutes=minute),
+                open=40000, high=40100, low=39900, close=40050, volume_24h=7, tick_count=2,
+            )
+            for minute in range(60)
+        )
+        self.write_dump([
+            ["BTC", (hour + timedelta(minutes=5, seconds=30)).isoformat(), "45000"],
+            ["BTC", (hour + timedelta(hours=2)).isoformat(), "41000"],
+        ])
+
+        import_history(self.path)
+
+        minutes = PriceRollup.objects.filter(coin=self.coin, tier=PriceRollup.TIER_MINUTE)
+        self.assertEqual(minutes.count(), 61)
+        merged = minutes.get(bucket=hour + timedelta(minutes=5))
+        self.assertEqual((merged.open, merged.high, merged.low, merged.tick_count), (40000, 45000, 39900, 2))
+        self.assertTrue(minutes.filter(bucket=hour + timedelta(hours=2), open=41000).exists())
+
+
+class RangeFilterTests(TestCase):
+    def setUp(self):
+        self.client = api_client(User.objects.create(username="reader"))
+        publish_prices(BTC=50000)
+
+    def test_non_finite_bounds_are_rejected(self):
+        for param in ("min_market_cap=inf", "max_volume_24h=-Infinity", "min_price_usd=nan"):
+            with self.subTest(param=param):
+                response = self.client.get(f"/api/crypto-list/?{param}")
+                self.assertEqual(response.status_code, 400)
+
+    def test_tied_ordering_pages_without_repeats_or_gaps(self):
+        # Every coin has market_cap 1, so only the id tiebreak orders them
+        publish_prices(**{f"T{index:02d}": 1 for index in range(7)})
+        expected = list(CryptoCurrency.objects.order_by("id").values_list("symbol", flat=True))
+
+        symbols = []
+        for page in range(1, 4):
+            body = self.client.get(f"/api/crypto-list/?ordering=market_cap&limit=3&page={page}").json()
+            symbols.extend(coin["symbol"] for coin in body["results"])
+
+        self.assertEqual(symbols, expected)
+
+    def test_requested_ordering_ends_on_id(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/crypto-list/?ordering=-volume_24h&limit=3")
+
+        order_by = 'ORDER BY "api_cryptocurrency"."volume_24h" DESC, "api_cryptocurrency"."id" ASC'
+        self.assertTrue(any(order_by in query["sql"] for query in queries))
+
+    def test_finite_bounds_filter(self):
+        response = self.client.get("/api/crypto-list/?min_market_cap=1e3")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+
+class CryptoSearchTests(TestCase):
+    def setUp(self):
+        self.client = api_client(User.objects.create(username="reader"))
+        publish_prices(BTC="50000.12345678")
+
+    def test_prices_render_like_the_list(self):
+        listed = self.client.get("/api/crypto-list/").json()[0]
+        found = self.client.get("/api/crypto-search/?q=btc").json()["results"][0]
+
+        self.assertEqual(found["price_usd"], "50000.12345678")
+        self.assertEqual(found["price_usd"], listed["price_usd"])
+
+
+class ConditionalDetailTests(TestCase):
+    def setUp(self):
+        self.client = api_client(User.objects.create(username="poller"))
+        publish_prices(BTC=50000)
+
+    def test_matching_etag_is_not_modified_until_the_next_ingest(self):
+        etag = self.client.get("/api/crypto-detail/BTC/")["ETag"]
+
+        response = self.client.get("/api/crypto-detail/BTC/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        publish_prices(BTC=51000)
+        response = self.client.get("/api/crypto-detail/BTC/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["price_usd"], "51000.00000000")
+
+    def test_etag_depends_on_the_query(self):
+        plain = self.client.get("/api/crypto-detail/BTC/")["ETag"]
+        projected = self.client.get("/api/crypto-detail/BTC/?fields=symbol,price_usd")
+
+        self.assertNotEqual(projected["ETag"], plain)
+        response = self.client.get("/api/crypto-detail/BTC/?fields=symbol,price_usd", HTTP_IF_NONE_MATCH=plain)
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(CRYPTO_RESPONSE_CACHE=True, CRYPTO_RESPONSE_CACHE_GZIP=True)
+class RenderedResponseCacheTests(TestCase):
+    def setUp(self):
+        self.client = api_client(User.objects.create(username="reader"))
+        # Enough coins for a second page and a body worth compressing
+        publish_prices(**{f"C{index:02d}": index + 1 for index in range(30)})
+
+    def test_gzipped_body_has_its_own_etag(self):
+        plain = self.client.get("/api/crypto-list/")
+        gzipped = self.client.get("/api/crypto-list/", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(gzipped["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertNotEqual(plain["ETag"], gzipped["ETag"])
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+    def test_not_modified_varies_on_accept_encoding(self):
+        etag = self.client.get("/api/crypto-list/", HTTP_ACCEPT_ENCODING="gzip")["ETag"]
+        response = self.client.get("/api/crypto-list/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "mirror.example"])
+    def test_cached_pages_keep_the_requesting_host(self):
+        first = self.client.get("/api/crypto-list/?limit=5", HTTP_HOST="testserver").json()
+        second = self.client.get("/api/crypto-list/?limit=5", HTTP_HOST="mirror.example").json()
+
+        self.assertTrue(first["next"].startswith("http://testserver/"))
+        self.assertTrue(second["next"].startswith("http://mirror.example/"))
+
+
+class RefreshFailureTests(TestCase):
+    def test_unexpected_error_marks_the_refresh_failed(self):
+        with mock.patch("apps.api.refresh.update_prices", side_effect=KeyError("current_price")):
+            with self.assertLogs("apps.api.refresh", level="ERROR"):
+                refresh = refresh_prices()
+
+        refresh.refresh_from_db()
+        self.assertEqual(refresh.status, PriceRefresh.STATUS_FAILED)
+        self.assertIn("KeyError", refresh.error)
+        # The lease was released, so the next refresh is not skipped
+        self.assertIsNotNone(acquire_lock(REFRESH_LOCK_NAME, 60))
+
+    def test_refresher_command_survives_a_failed_refresh(self):
+        with mock.patch(
+            "apps.api.management.commands.refresh_prices.refresh_prices",
+            side_effect=OperationalError("database is locked"),
+        ):
+            with self.assertLogs("apps.api.management.commands.refresh_prices", level="ERROR"):
+                call_command("refresh_prices", "--once", stdout=io.StringIO(), stderr=io.StringIO())
+
+
+def market_entry(coin_id="bitcoin", **values):
+    """A /coins/markets entry, with `values` overriding the defaults."""
+    entry = {
+        "id": coin_id,
+        "name": coin_id.title(),
+        "current_price": 50000,
+        "market_cap": 1,
+        "total_volume": 1,
+        "price_change_percentage_24h": 1.5,
+        "circulating_supply": 1,
+    }
+    entry.update(values)
+    return entry
+
+
+class IngestMarketDataTests(TestCase):
+    def setUp(self):
+        publish_prices(BTC=68000)
+        self.coin = CryptoCurrency.objects.get(symbol="BTC")
+
+    def test_null_price_keeps_the_stored_row(self):
+        with mock.patch("apps.api.services.evaluate_alerts") as evaluate, \
+                self.captureOnCommitCallbacks(execute=True):
+            result = ingest_market_data([market_entry(current_price=None)], {"bitcoin": "BTC"})
+
+        self.assertEqual(result.changed, [])
+        self.coin.refresh_from_db()
+        self.assertEqual(self.coin.price_usd, Decimal("68000"))
+        self.assertFalse(PriceTick.objects.filter(coin=self.coin).exists())
+        evaluate.assert_not_called()
+
+    def test_null_fields_keep_their_stored_values(self):
+        ingest_market_data([market_entry(current_price=70000, market_cap=None)], {"bitcoin": "BTC"})
+
+        self.coin.refresh_from_db()
+        self.assertEqual((self.coin.price_usd, self.coin.market_cap), (Decimal("70000"), 1))
+
+
+class BulkIngestTests(TestCase):
+    def ingest(self, count, price, prefix="coin"):
+        """Ingest `count` coins at `price`; returns (IngestResult, queries run)."""
+        entries = [market_entry(f"{prefix}-{i}", current_price=price) for i in range(count)]
+        id_map = {f"{prefix}-{i}": f"{prefix[0].upper()}{i}" for i in range(count)}
+        with CaptureQueriesContext(connection) as queries:
+            result = ingest_market_data(entries, id_map, create_missing=True)
+        return result, len(queries)
+
+    def test_query_count_does_not_grow_with_the_payload(self):
+        _, small = self.ingest(5, 1, prefix="alpha")
+        _, large = self.ingest(50, 1, prefix="beta")
+        self.assertEqual(large, small)
+
+        _, small_update = self.ingest(5, 2, prefix="alpha")
+        result, large_update = self.ingest(50, 2, prefix="beta")
+        self.assertEqual(len(result.changed), 50)
+        self.assertEqual(large_update, small_update)
+
+    def test_unchanged_rows_are_not_written(self):
+        _, written = self.ingest(20, 1)
+        result, queries = self.ingest(20, 1)
+
+        self.assertEqual((result.changed, len(result.unchanged)), ([], 20))
+        self.assertLess(queries, written)
+        self.assertEqual(PriceTick.objects.count(), 20)
+
+
+class FxRateVersionTests(TestCase):
+    def setUp(self):
+        FxRate.objects.create(currency="EUR", per_usd=Decimal("0.9"))
+
+    def test_rate_within_tolerance_is_not_a_change(self):
+        versions = IngestVersion.objects.count()
+        self.assertEqual(store_fx_rates({"EUR": Decimal("0.90000001")}), [])
+        self.assertEqual(IngestVersion.objects.count(), versions)
+
+        self.assertEqual(store_fx_rates({"EUR": Decimal("0.95")}), ["EUR"])
+        self.assertEqual(IngestVersion.objects.count(), versions + 1)
+
+    def test_quoted_detail_is_modified_by_an_fx_only_refresh(self):
+        client = api_client(User.objects.create(username="reader"))
+        publish_prices(BTC=50000)
+        row_updated = timezone.now() - timedelta(hours=1)
+        CryptoCurrency.objects.filter(symbol="BTC").update(last_updated=row_updated)
+        FxRate.objects.filter(currency="EUR").update(updated_at=timezone.now())
+        since = http_date(row_updated.timestamp() + 1)
+
+        plain = client.get("/api/crypto-detail/BTC/", HTTP_IF_MODIFIED_SINCE=since)
+        quoted = client.get("/api/crypto-detail/BTC/?quote=EUR", HTTP_IF_MODIFIED_SINCE=since)
+
+        self.assertEqual(plain.status_code, 304)
+        self.assertEqual(quoted.status_code, 200)
+
+    def test_fx_change_shares_the_price_ingest_version(self):
+        coin = market_entry()
+        versions = IngestVersion.objects.count()
+        with mock.patch("apps.api.services.load_universe", return_value={"bitcoin": "BTC"}), \
+                mock.patch("apps.api.services.fetch_market_data", return_value=[coin]), \
+                mock.patch("apps.api.services.fetch_fx_rates", return_value={"EUR": Decimal("0.95")}):
+            result = update_prices()
+
+        self.assertEqual(result.changed, ["BTC"])
+        self.assertEqual(FxRate.objects.get(currency="EUR").per_usd, Decimal("0.95"))
+        self.assertEqual(IngestVersion.objects.count(), versions + 1)
+
+
+class MarketFetcherTests(SimpleTestCase):
+    def serve(self, **options):
+        """Start a stub server for this test; returns (fetcher pointed at it, the handler's request log)."""
+        server = make_stub_server(coins=canned_coins(50), **options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        fetcher = MarketFetcher(
+            api_url=f"http://127.0.0.1:{server.server_port}/coins/markets",
+            fx_url=f"http://127.0.0.1:{server.server_port}/simple/price",
+            per_page=10, max_workers=4, rate=1000, burst=100, max_retries=2, backoff=0.01,
+        )
+        self.addCleanup(fetcher.close)
+        return fetcher, server.RequestHandlerClass.requests
+
+    def test_top_coins_are_fetched_across_pages_in_order(self):
+        fetcher, requests_seen = self.serve()
+
+        coins = fetcher.fetch_top(25)
+
+        self.assertEqual([coin["id"] for coin in coins], [coin["id"] for coin in canned_coins(25)])
+        self.assertEqual(sorted(query["page"][0] for query in requests_seen), ["1", "2", "3"])
+
+    def test_ids_are_chunked_into_pages(self):
+        fetcher, requests_seen = self.serve()
+        wanted = [f"stub-coin-{i}" for i in range(0, 50, 2)]
+
+        coins = fetcher.fetch_ids(wanted)
+
+        self.assertEqual(sorted(coin["id"] for coin in coins), sorted(wanted))
+        self.assertEqual(sorted(int(query["per_page"][0]) for query in requests_seen), [5, 10, 10])
+
+    def test_rate_limited_pages_are_retried_after_retry_after(self):
+        fetcher, requests_seen = self.serve(rate_limited=2, retry_after=0)
+
+        coins = fetcher.fetch_top(10)
+
+        self.assertEqual(len(coins), 10)
+        self.assertEqual(len(requests_seen), 1)
+
+    def test_rate_limit_outlasting_the_retries_fails(self):
+        fetcher, _ = self.serve(rate_limited=10, retry_after=0)
+
+        with self.assertRaises(requests.HTTPError) as raised:
+            fetcher.fetch_top(10)
+        self.assertEqual(raised.exception.response.status_code, 429)
+
+    def test_rate_limited_fx_quotes_are_retried(self):
+        fetcher, _ = self.serve(rate_limited=2, retry_after=0)
+
+        fx = fetcher.fetch_fx(["EUR", "GBP"])
+
+        self.assertEqual(fx, {"EUR": Decimal("0.92"), "GBP": Decimal("0.79")})
+
+    def test_upstream_error_fails_the_fetch(self):
+        fetcher, _ = self.serve(error_status=503)
+
+        with self.assertRaises(requests.HTTPError) as raised:
+            fetcher.fetch_top(25)
+        self.assertEqual(raised.exception.response.status_code, 503)
+
+    def test_token_bucket_paces_requests_beyond_the_burst(self):
+        fetcher, requests_seen = self.serve()
+        fetcher.bucket = type(fetcher.bucket)(rate=20, capacity=1)
+
+        started = time.monotonic()
+        fetcher.fetch_top(50)
+
+        self.assertEqual(len(requests_seen), 5)
+        # One request from the burst, then four more at 20 per second
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+
+    def test_token_bucket_rejects_a_non_positive_rate(self):
+        for rate in (0, -1):
+            with self.assertRaises(ValueError):
+                TokenBucket(rate=rate, capacity=1)
+
+
+class PriceAlertTests(TestCase):
+    def setUp(self):
+        # Alert ids are reused once a test rolls back, so start from a fresh index
+        alerts._index = None
+        self.client = api_client(User.objects.create(username="watcher"))
+        publish_prices(BTC=50000)
+        self.coin = CryptoCurrency.objects.get(symbol="BTC")
+        self.notifier = mock.Mock()
+
+    def create_alert(self, kind, threshold):
+        response = self.client.post(
+            "/api/alerts/", {"symbol": "btc", "kind": kind, "threshold": threshold}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    def move(self, old, new, change=(1.0, 1.0)):
+        fired = alerts.evaluate_alerts({self.coin.pk: {"price": (old, new), "change": change}}, self.notifier)
+        return sorted(alert.pk for alert in fired)
+
+    def test_only_crossed_alerts_fire(self):
+        above = self.create_alert(PriceAlert.KIND_PRICE_ABOVE, "52000")
+        below = self.create_alert(PriceAlert.KIND_PRICE_BELOW, "48000")
+        far_above = self.create_alert(PriceAlert.KIND_PRICE_ABOVE, "60000")
+        change = self.create_alert(PriceAlert.KIND_CHANGE_BELOW, "-5")
+
+        self.assertEqual(self.move(50000, 53000), [above])
+        self.assertEqual(self.move(53000, 47000, change=(1.0, -6.0)), sorted([below, change]))
+        self.assertEqual(self.notifier.notify.call_count, 2)
+        self.assertTrue(PriceAlert.objects.get(pk=far_above).active)
+        self.assertIsNotNone(PriceAlert.objects.get(pk=above).triggered_at)
+
+    def test_alerts_fire_once_until_re_armed(self):
+        alert = self.create_alert(PriceAlert.KIND_PRICE_ABOVE, "52000")
+        self.assertEqual(self.move(50000, 53000), [alert])
+        self.assertEqual(self.move(50000, 53000), [])
+
+        response = self.client.patch(f"/api/alerts/{alert}/", {"active": True}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.move(50000, 53000), [alert])
+
+    def test_deleted_alerts_do_not_fire(self):
+        alert = self.create_alert(PriceAlert.KIND_PRICE_ABOVE, "52000")
+        self.move(50000, 50000)
+        self.client.delete(f"/api/alerts/{alert}/")
+
+        self.assertEqual(self.move(50000, 53000), [])
+
+
+class ChangesSinceTests(TestCase):
+    def setUp(self):
+        self.client = api_client(User.objects.create(username="follower"))
+        publish_prices(BTC=50000, ETH=3000, SOL=150)
+        self.base = versioning.current_version()
+
+    def test_cursor_collects_every_later_change(self):
+        first = versioning.record_ingest(["BTC"])
+        latest = versioning.record_ingest(["ETH"])
+
+        self.assertEqual(versioning.changes_since(self.base), (latest, {"BTC", "ETH"}))
+        self.assertEqual(versioning.changes_since(first), (latest, {"ETH"}))
+        self.assertEqual(versioning.changes_since(latest), (latest, set()))
+
+    def test_unusable_cursors_ask_for_a_full_snapshot(self):
+        latest = versioning.record_ingest(["BTC"])
+
+        self.assertEqual(versioning.changes_since(0), (latest, None))
+        self.assertEqual(versioning.changes_since(latest + 1), (latest, None))
+        with override_settings(CRYPTO_CHANGES_MAX_VERSIONS=1):
+            versioning.record_ingest(["ETH"])
+            self.assertIsNone(versioning.changes_since(self.base)[1])
+
+    def test_pruned_cursor_asks_for_a_full_snapshot(self):
+        first = versioning.record_ingest(["BTC"])
+        latest = versioning.record_ingest(["ETH"])
+        with override_settings(CRYPTO_CHANGES_MAX_VERSIONS=1):
+            versioning.prune_versions()
+
+        self.assertEqual(versioning.changes_since(self.base), (latest, None))
+        self.assertEqual(versioning.changes_since(first), (latest, {"ETH"}))
+
+    def test_endpoint_returns_only_changed_coins_and_the_next_cursor(self):
+        latest = versioning.record_ingest(["ETH"])
+
+        body = self.client.get(f"/api/crypto-list/changes/?since={self.base}").json()
+
+        self.assertEqual((body["version"], body["full"]), (latest, False))
+        self.assertEqual([coin["symbol"] for coin in body["results"]], ["ETH"])
+
+
+class PriceBroadcasterTests(TestCase):
+    def setUp(self):
+        publish_prices(BTC=50000, ETH=3000)
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.broadcaster = PriceBroadcaster(poll_interval=3600)
+        # Broadcast by hand instead of from the polling thread
+        self.broadcaster._thread = object()
+        self.broadcaster.version = versioning.current_version()
+
+    def subscribe(self, *symbols):
+        async def subscribe():
+            return self.broadcaster.subscribe(set(symbols))
+        return self.loop.run_until_complete(subscribe())
+
+    def ingest(self, symbol, price):
+        CryptoCurrency.objects.filter(symbol=symbol).update(price_usd=price)
+        version = versioning.record_ingest([symbol])
+        self.broadcaster._broadcast(version)
+        # Let the loop run the fan-out scheduled from the broadcasting thread
+        self.loop.run_until_complete(asyncio.sleep(0))
+        return version
+
+    def drain(self, subscription):
+        messages = []
+        while not subscription.queue.empty():
+            messages.append(subscription.queue.get_nowait())
+        return messages
+
+    def test_deltas_reach_only_interested_subscribers(self):
+        everything, btc, eth = self.subscribe(), self.subscribe("BTC"), self.subscribe("ETH")
+
+        version = self.ingest("BTC", 51000)
+
+        message = self.drain(everything)
+        self.assertEqual(message, self.drain(btc))
+        self.assertEqual(len(message), 1)
+        self.assertIn(f"id: {version}\nevent: prices\n".encode(), message[0])
+        self.assertIn(b'"BTC":{"price_usd":"51000.00000000"', message[0])
+        self.assertEqual(self.drain(eth), [])
+
+    @override_settings(CRYPTO_STREAM_QUEUE_SIZE=1)
+    def test_slow_subscriber_gets_a_resync(self):
+        subscription = self.subscribe()
+
+        self.ingest("BTC", 51000)
+        self.ingest("ETH", 3100)
+
+        self.assertEqual(self.drain(subscription), [RESYNC])
+        self.assertEqual(self.broadcaster.resyncs, 1)
+
+    def test_unsubscribed_clients_get_nothing(self):
+        subscription = self.subscribe()
+        self.broadcaster.unsubscribe(subscription)
+
+        self.ingest("BTC", 51000)
+
+        self.assertEqual(self.drain(subscription), [])
+        self.assertEqual(self.broadcaster.subscriber_count(), 0)
+
+
+class LeanMiddlewareTests(TestCase):
+    def seen_by_view(self, middleware_class, path):
+        """Run one middleware on a request for `path`; returns the request the view received."""
+        seen = []
+
+        def view(request):
+            seen.append(request)
+            return HttpResponse()
+
+        middleware = middleware_class(view)
+        request = RequestFactory().get(path)
+        if middleware_class is LeanAuthenticationMiddleware:
+            request.session = {}
+        middleware(request)
+        return seen[0]
+
+    def test_api_routes_skip_session_and_auth_middleware(self):
+        self.assertFalse(hasattr(self.seen_by_view(LeanSessionMiddleware, "/api/crypto-list/"), "session"))
+        self.assertFalse(hasattr(self.seen_by_view(LeanAuthenticationMiddleware, "/api/crypto-list/"), "user"))
+
+    def test_other_and_excluded_routes_run_them(self):
+        for path in ["/auth/login/", "/api/logout/"]:
+            with self.subTest(path=path):
+                self.assertTrue(hasattr(self.seen_by_view(LeanSessionMiddleware, path), "session"))
+                self.assertTrue(hasattr(self.seen_by_view(LeanAuthenticationMiddleware, path), "user"))
+
+    def test_api_requests_still_authenticate_through_the_full_stack(self):
+        client = api_client(User.objects.create(username="lean"))
+
+        response = client.get("/api/crypto-list/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(hasattr(response.wsgi_request, "session"))
+        self.assertNotIn("sessionid", response.cookies)
@@ -3,10 +3,26 @@ from apps.api import views
 
 urlpatterns = [
     path("crypto-list/", views.CryptoListView.as_view(), name="crypto-list"),
+    path("crypto-list/changes/", views.CryptoChangesView.as_view(), name="crypto-changes"),
+    path("crypto-search/", views.CryptoSearchView.as_view(), name="crypto-search"),
     path("crypto-detail/<str:symbol>/", views.CryptoDetailView.as_view(), name="crypto-detail"),
+    path("crypto-detail/<str:symbol>/chart/", views.CryptoChartView.as_view(), name="crypto-chart"),
     path("crypto-conversion/", views.CryptoConversionView.as_view(), name="crypto-conversion"),
+    path("crypto-conversion/batch/", views.BatchConversionView.as_view(), name="crypto-conversion-batch"),
+    path("fx-rates/", views.FxRatesView.as_view(), name="fx-rates"),
+    path("rates/<str:symbol>/", views.CryptoRatesView.as_view(), name="crypto-rates"),
     path("conversion-history/", views.ConversionHistoryView.as_view(), name="conversion-history"),
+    path("conversion-history/summary/", views.ConversionSummaryView.as_view(), name="conversion-summary"),
+    path("portfolio/holdings/", views.HoldingListView.as_view(), name="holding-list"),
+    path("portfolio/holdings/<str:symbol>/", views.HoldingDetailView.as_view(), name="holding-detail"),
+    path("portfolio/value/", views.PortfolioValueView.as_view(), name="portfolio-value"),
+    path("portfolio/history/", views.PortfolioHistoryView.as_view(), name="portfolio-history"),
+    path("alerts/", views.PriceAlertListView.as_view(), name="alert-list"),
+    path("alerts/<int:pk>/", views.PriceAlertDetailView.as_view(), name="alert-detail"),
     path("apr-calculator/", views.APRCalculatorView.as_view(), name="apr-calculator"),
+    path("apr-calculator/scenarios/", views.APRScenarioView.as_view(), name="apr-scenarios"),
     path("update-data/", views.UpdateCryptoData.as_view(), name="update-data"),
+    path("price-stream/", views.price_stream, name="price-stream"),
+    path("metrics/", views.MetricsView.as_view(), name="metrics"),
     path('logout/', views.logout_view, name='logout'),
 ]
\ No newline at end of file
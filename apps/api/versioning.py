@@ -0,0 +1,95 @@
+import threading
+import time
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min
+from apps.api.models import IngestVersion
+
+_lock = threading.Lock()
+_state = {"version": None, "created_at": None, "checked_at": 0.0}
+
+
+def _remember(version, created_at):
+    with _lock:
+        if _state["version"] is None or version > _state["version"]:
+            _state["version"] = version
+            _state["created_at"] = created_at
+        _state["checked_at"] = time.monotonic()
+
+
+def _refresh():
+    """Return (version, created_at), re-reading the latest version once the cached one expires."""
+    with _lock:
+        if _state["version"] is not None and time.monotonic() - _state["checked_at"] < settings.INGEST_VERSION_TTL:
+            return _state["version"], _state["created_at"]
+
+    latest = IngestVersion.objects.order_by("-pk").values_list("pk", "created_at").first()
+    _remember(*(latest or (0, None)))
+    with _lock:
+        return _state["version"], _state["created_at"]
+
+
+def record_ingest(changed_symbols):
+    """
+    Assign a new ingest version to a set of changed symbols.
+    Must run inside the transaction that wrote the changes; the new version
+    becomes visible to this process once that transaction commits.
+
+    changes_since treats versions as a cursor, which needs them to commit in
+    primary key order: a version committing after a higher one had been read
+    would never be delivered. Locking the latest version row until commit
+    serializes ingests, so a version number is only taken once every lower
+    one has committed.
+    """
+    with transaction.atomic():
+        IngestVersion.objects.select_for_update().order_by("-pk").values_list("pk", flat=True).first()
+        ingest = IngestVersion.objects.create(changed_symbols=list(changed_symbols))
+    transaction.on_commit(lambda: _remember(ingest.pk, ingest.created_at))
+    return ingest.pk
+
+
+def current_version():
+    """
+    Return the latest committed ingest version (0 before the first ingest).
+    The value is cached per process for INGEST_VERSION_TTL seconds, so readers
+    in other processes pick up a new version within that window.
+    """
+    return _refresh()[0]
+
+
+def last_ingest_at():
+    """Return when the current ingest version was recorded, or None before the first ingest."""
+    return _refresh()[1]
+
+
+def changes_since(since):
+    """
+    Return (version, symbols) covering every ingest after version `since`.
+    `symbols` is None when a full snapshot is needed instead: `since` is 0,
+    newer than anything recorded, older than the versions still kept, or
+    more than CRYPTO_CHANGES_MAX_VERSIONS behind.
+    Relies on versions committing in primary key order, which record_ingest enforces.
+    """
+    bounds = IngestVersion.objects.aggregate(oldest=Min("pk"), latest=Max("pk"))
+    latest = bounds["latest"] or 0
+
+    if since <= 0 or since > latest or since < bounds["oldest"] - 1:
+        return latest, None
+    if since == latest:
+        return latest, set()
+    if latest - since > settings.CRYPTO_CHANGES_MAX_VERSIONS:
+        return latest, None
+
+    symbols = set()
+    for changed in IngestVersion.objects.filter(pk__gt=since, pk__lte=latest).values_list("changed_symbols", flat=True):
+        symbols.update(changed)
+    return latest, symbols
+
+
+def prune_versions():
+    """Delete ingest versions too old to serve a delta from. Returns the number deleted."""
+    latest = IngestVersion.objects.aggregate(latest=Max("pk"))["latest"]
+    if latest is None:
+        return 0
+    deleted, _ = IngestVersion.objects.filter(pk__lte=latest - settings.CRYPTO_CHANGES_MAX_VERSIONS).delete()
+    return deleted
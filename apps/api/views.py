@@ -1,31 +1,183 @@
+import asyncio
 from rest_framework import views, generics, permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from django.contrib.auth.models import User
-from decimal import Decimal, ROUND_DOWN
+from django.shortcuts import get_object_or_404
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
 from apps.api.serializers import (
     CryptoCurrencySerializer,
     ConversionHistorySerializer,
     APRCalculatorSerializer,
+    APRScenarioSerializer,
+    ChartQuerySerializer,
+    ChangesQuerySerializer,
+    ConversionHistoryFilterSerializer,
+    ConversionPairStatsSerializer,
+    ConversionDailyStatsSerializer,
+    HoldingSerializer,
+    PriceAlertSerializer,
+    SearchQuerySerializer,
+    PortfolioQuerySerializer,
+    PortfolioHistoryQuerySerializer,
 )
-from apps.api.models import CryptoCurrency, ConversionHistory
-from apps.api.services import get_crypto_data
+from apps.api.models import CryptoCurrency, ConversionHistory, ConversionPairStats, ConversionDailyStats, Holding, PriceAlert
+from apps.api.apr import scenario_grid
+from apps.api.charts import chart_series
+from apps.api.conditional import (
+    crypto_detail_etag,
+    crypto_detail_last_modified,
+    crypto_list_etag,
+    crypto_list_last_modified,
+    params_digest,
+)
+from apps.api.filters import RangeFilter, StableOrderingFilter
+from apps.api.portfolio import load_holdings, portfolio_history, value_portfolios
+from apps.api.pagination import ConversionHistoryPagination, CryptoListPagination
+from apps.api.rates import get_price_snapshot
+from apps.api.refresh import latest_refresh, is_stale, trigger_refresh
+from apps.api.response_cache import RenderedResponse, ResponseCache
+from apps.api.search import get_search_index
+from apps.api.services import convert_amount, get_history_buffer, parse_amount, record_conversions
+from apps.api.versioning import changes_since, current_version
+from apps.api.stream import RESYNC, get_broadcaster
+from apps.users.authentication import JWTAuthenticationFromCookies, user_cache
+from apps.users.revocation import revocations
+from apps.users.views import revoke_request_tokens
+from asgiref.sync import sync_to_async
 from django.contrib.auth import logout
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import AuthenticationFailed
+
+MISSING_FIELDS_ERROR = "Missing required fields: from_currency, to_currency, and amount."
+INVALID_AMOUNT_ERROR = "Invalid amount provided. Please provide a numeric value."
+INVALID_SYMBOL_ERROR = "Invalid currency symbol provided. Please ensure the symbols are correct."
+AMOUNT_TOO_LARGE_ERROR = "Amount is too large."
+
+
+class FieldProjectionMixin:
+    """
+    Let clients pick output fields with ?fields=a,b,c.
+    Only the requested columns are loaded and serialized.
+    """
+
+    def get_requested_fields(self):
+        fields = self.request.query_params.get("fields")
+        if not fields:
+            return None
+
+        requested = [name.strip() for name in fields.split(",") if name.strip()]
+        allowed = set(self.get_serializer_class()().fields)
+        unknown = [name for name in requested if name not in allowed]
+        if unknown:
+            raise ValidationError({"fields": f"Unknown fields: {', '.join(unknown)}"})
+        return requested
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        if fields:
+            # The lookup field is always needed to find the row
+            queryset = queryset.only(*{*fields, getattr(self, "lookup_field", "pk")})
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
 
 
-class CryptoListView(generics.ListAPIView):
+class QuoteCurrencyMixin:
+    """
+    Let clients add prices in a fiat currency from the FX table with ?quote=EUR.
+    Conversion happens in memory; USD fields are returned unchanged.
+    """
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        quote = self.request.query_params.get("quote")
+        if quote:
+            currency = quote.upper()
+            per_usd = get_price_snapshot().fx_rate(currency)
+            if per_usd is None:
+                raise ValidationError({"quote": f"Unsupported quote currency: {currency}"})
+            context["quote"] = (currency, per_usd)
+        return context
+
+
+response_cache = ResponseCache(settings.CRYPTO_RESPONSE_CACHE_ENTRIES)
+
+
+class RenderedCacheMixin:
+    """
+    Serve JSON responses from bytes rendered once per ingest version and query string,
+    so repeated reads skip the serializer and renderer entirely.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not settings.CRYPTO_RESPONSE_CACHE or request.accepted_renderer.format != "json":
+            return super().get(request, *args, **kwargs)
+
+        version = current_version()
+        # Paginated bodies carry absolute next/previous links, so the host is part of the key
+        key = (
+            type(self).__name__,
+            tuple(sorted(kwargs.items())),
+            params_digest(request),
+            request.scheme,
+            request.get_host(),
+        )
+        entry = response_cache.get(key, version)
+
+        if entry is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            renderer = request.accepted_renderer
+            body = renderer.render(response.data, request.accepted_media_type, self.get_renderer_context())
+            content_type = f"{renderer.media_type}; charset={renderer.charset}" if renderer.charset else renderer.media_type
+            entry = RenderedResponse(body, content_type, settings.CRYPTO_RESPONSE_CACHE_GZIP)
+            response_cache.set(key, version, entry)
+
+        return entry.to_response(request)
+
+
+class CryptoListView(FieldProjectionMixin, QuoteCurrencyMixin, RenderedCacheMixin, generics.ListAPIView):
     """
     API to list all available cryptocurrencies.
+    Supports ?limit=&page= pagination, ?ordering= on market_cap, volume_24h and
+    percent_change_24h, min_/max_ filters on those fields, ?fields= projection
+    and ?quote= fiat prices.
+    Answers If-None-Match / If-Modified-Since with 304 before serializing.
     """
 
     queryset = CryptoCurrency.objects.all()
     serializer_class = CryptoCurrencySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CryptoListPagination
+    filter_backends = [RangeFilter, StableOrderingFilter]
+    range_filter_fields = ["market_cap", "volume_24h", "percent_change_24h", "price_usd"]
+    ordering_fields = ["market_cap", "volume_24h", "percent_change_24h"]
+    ordering = ["-market_cap", "id"]
+
+    @method_decorator(vary_on_headers("Accept-Encoding"))
+    @method_decorator(cache_control(private=True, no_cache=True))
+    @method_decorator(condition(etag_func=crypto_list_etag, last_modified_func=crypto_list_last_modified))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
 
-class CryptoDetailView(generics.RetrieveAPIView):
+class CryptoDetailView(FieldProjectionMixin, QuoteCurrencyMixin, RenderedCacheMixin, generics.RetrieveAPIView):
     """
-    API to get details of a specific cryptocurrency by symbol.
+    API to get details of a specific cryptocurrency by symbol, optionally with ?quote= fiat prices.
+    Answers If-None-Match / If-Modified-Since with 304 before serializing.
     """
 
     queryset = CryptoCurrency.objects.all()
@@ -33,6 +185,100 @@ class CryptoDetailView(generics.RetrieveAPIView):
     lookup_field = "symbol"
     permission_classes = [permissions.IsAuthenticated]
 
+    @method_decorator(vary_on_headers("Accept-Encoding"))
+    @method_decorator(cache_control(private=True, no_cache=True))
+    @method_decorator(condition(etag_func=crypto_detail_etag, last_modified_func=crypto_detail_last_modified))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class CryptoSearchView(views.APIView):
+    """
+    API to autocomplete cryptocurrencies by symbol or name prefix (?q=, ?limit=).
+    Exact symbol matches come first, then matches by market cap.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        serializer = SearchQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        results = get_search_index().search(serializer.validated_data["q"], serializer.validated_data["limit"])
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class FxRatesView(views.APIView):
+    """API to list the fiat currencies prices can be quoted in, as units per USD."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response(
+            {"base": "USD", "rates": get_price_snapshot().fx},
+            status=status.HTTP_200_OK,
+        )
+
+
+class CryptoChangesView(views.APIView):
+    """
+    API to list the cryptocurrencies changed since ingest version ?since=N.
+    Falls back to every cryptocurrency (with "full": true) when N is 0 or too old.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        serializer = ChangesQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        version, symbols = changes_since(serializer.validated_data["since"])
+        queryset = CryptoCurrency.objects.order_by("-market_cap", "id")
+        if symbols is not None:
+            queryset = queryset.filter(symbol__in=symbols) if symbols else queryset.none()
+
+        return Response(
+            {
+                "version": version,
+                "full": symbols is None,
+                "results": CryptoCurrencySerializer(queryset, many=True).data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class CryptoChartView(views.APIView):
+    """
+    API to get a downsampled price series for a cryptocurrency.
+    Accepts a range (e.g. 24h, 7d, 1y) and a target number of points.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, symbol):
+        serializer = ChartQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        crypto = get_object_or_404(CryptoCurrency, symbol=symbol.upper())
+        tier, series = chart_series(
+            crypto,
+            serializer.validated_data["range"],
+            serializer.validated_data["points"],
+        )
+
+        return Response(
+            {
+                "symbol": crypto.symbol,
+                "range": request.query_params.get("range", "7d"),
+                "tier": tier,
+                # [epoch milliseconds, price] pairs keep the payload compact
+                "points": [[int(x * 1000), y] for x, y in series],
+            },
+            status=status.HTTP_200_OK,
+        )
 
 
 class CryptoConversionView(views.APIView):
@@ -51,65 +297,341 @@ class CryptoConversionView(views.APIView):
 
         if not from_currency_symbol or not to_currency_symbol or not amount_str:
             return Response(
-                {"error": "Missing required fields: from_currency, to_currency, and amount."},
+                {"error": MISSING_FIELDS_ERROR},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            amount = Decimal(amount_str)
-        except (TypeError, ValueError):
+        amount = parse_amount(amount_str)
+        if amount is None:
             return Response(
-                {"error": "Invalid amount provided. Please provide a numeric value."},
+                {"error": INVALID_AMOUNT_ERROR},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            from_coin = CryptoCurrency.objects.get(symbol=from_currency_symbol.upper())
-            to_coin = CryptoCurrency.objects.get(symbol=to_currency_symbol.upper())
+        from_symbol = from_currency_symbol.upper()
+        to_symbol = to_currency_symbol.upper()
 
-            # Calculate conversion based on USD prices
-            conversion_rate = from_coin.price_usd / to_coin.price_usd
-            converted_amount = amount * conversion_rate
+        # Rates come from this worker's in-memory price snapshot, not the database
+        conversion_rate = get_price_snapshot().rate(from_symbol, to_symbol)
+        if conversion_rate is None:
+            return Response(
+                {"error": INVALID_SYMBOL_ERROR},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        converted_amount = convert_amount(amount, conversion_rate)
+        if converted_amount is None:
+            return Response(
+                {"error": AMOUNT_TOO_LARGE_ERROR},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-            # Store in conversion history
-            if request.user.is_authenticated:
-                ConversionHistory.objects.create(
+        # Store in conversion history
+        if request.user.is_authenticated:
+            record_conversions(
+                [
+                    ConversionHistory(
+                        user=request.user,
+                        from_currency=from_symbol,
+                        to_currency=to_symbol,
+                        amount=amount,
+                        converted_amount=converted_amount,
+                        conversion_rate=conversion_rate,
+                    )
+                ]
+            )
+
+        return Response(
+            {
+                "from_currency": from_symbol,
+                "to_currency": to_symbol,
+                "amount": float(amount),
+                "converted_amount": float(converted_amount),
+                "conversion_rate": float(conversion_rate),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class BatchConversionView(views.APIView):
+    """
+    API endpoint to convert many amounts in one request.
+
+    All items are priced against the same snapshot and stored with a single
+    bulk insert. Invalid items get an inline error instead of failing the batch.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        items = request.data.get("items") if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "Provide a non-empty list of items, each with from_currency, to_currency and amount."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > settings.CONVERSION_BATCH_MAX_ITEMS:
+            return Response(
+                {"error": f"A batch may contain at most {settings.CONVERSION_BATCH_MAX_ITEMS} items."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        snapshot = get_price_snapshot()
+        results = []
+        history = []
+
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results.append({"index": index, "error": "Each item must be an object."})
+                continue
+
+            from_symbol = str(item.get("from_currency") or "").upper()
+            to_symbol = str(item.get("to_currency") or "").upper()
+            if not from_symbol or not to_symbol or item.get("amount") in (None, ""):
+                results.append({"index": index, "error": MISSING_FIELDS_ERROR})
+                continue
+
+            amount = parse_amount(item["amount"])
+            if amount is None:
+                results.append({"index": index, "error": INVALID_AMOUNT_ERROR})
+                continue
+
+            conversion_rate = snapshot.rate(from_symbol, to_symbol)
+            if conversion_rate is None:
+                results.append({"index": index, "error": INVALID_SYMBOL_ERROR})
+                continue
+
+            converted_amount = convert_amount(amount, conversion_rate)
+            if converted_amount is None:
+                results.append({"index": index, "error": AMOUNT_TOO_LARGE_ERROR})
+                continue
+
+            history.append(
+                ConversionHistory(
                     user=request.user,
-                    from_currency=from_currency_symbol.upper(),
-                    to_currency=to_currency_symbol.upper(),
+                    from_currency=from_symbol,
+                    to_currency=to_symbol,
                     amount=amount,
                     converted_amount=converted_amount,
                     conversion_rate=conversion_rate,
                 )
-
-            return Response(
+            )
+            results.append(
                 {
-                    "from_currency": from_currency_symbol.upper(),
-                    "to_currency": to_currency_symbol.upper(),
+                    "index": index,
+                    "from_currency": from_symbol,
+                    "to_currency": to_symbol,
                     "amount": float(amount),
                     "converted_amount": float(converted_amount),
                     "conversion_rate": float(conversion_rate),
-                },
-                status=status.HTTP_200_OK,
+                }
             )
 
-        except CryptoCurrency.DoesNotExist:
+        record_conversions(history)
+
+        return Response({"version": snapshot.version, "results": results}, status=status.HTTP_200_OK)
+
+
+class CryptoRatesView(views.APIView):
+    """
+    API to get conversion rates from one cryptocurrency to every other.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, symbol):
+        snapshot = get_price_snapshot()
+        rates = snapshot.rates_for(symbol.upper())
+        if rates is None:
             return Response(
-                {"error": "Invalid currency symbol provided. Please ensure the symbols are correct."},
-                status=status.HTTP_400_BAD_REQUEST,
+                {"error": INVALID_SYMBOL_ERROR},
+                status=status.HTTP_404_NOT_FOUND,
             )
 
+        return Response(
+            {"base": symbol.upper(), "version": snapshot.version, "rates": rates},
+            status=status.HTTP_200_OK,
+        )
+
 
 class ConversionHistoryView(generics.ListAPIView):
     """
-    API to get the conversion history of the authenticated user.
+    API to get the conversion history of the authenticated user, newest first.
+    Cursor paginated; filter with since/until and from_currency/to_currency.
     """
 
     serializer_class = ConversionHistorySerializer
+    pagination_class = ConversionHistoryPagination
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return ConversionHistory.objects.filter(user=self.request.user)
+        filters = ConversionHistoryFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        params = filters.validated_data
+
+        queryset = ConversionHistory.objects.filter(user=self.request.user)
+        if "since" in params:
+            queryset = queryset.filter(timestamp__gte=params["since"])
+        if "until" in params:
+            queryset = queryset.filter(timestamp__lt=params["until"])
+        if "from_currency" in params:
+            queryset = queryset.filter(from_currency=params["from_currency"].upper())
+        if "to_currency" in params:
+            queryset = queryset.filter(to_currency=params["to_currency"].upper())
+        return queryset
+
+
+class ConversionSummaryView(views.APIView):
+    """
+    API to get a summary of the authenticated user's conversion history:
+    totals per currency pair, the most used pairs and conversions per day.
+    Served from incrementally maintained stats, never by scanning the history.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            days = min(max(int(request.query_params.get("days", 30)), 1), 366)
+        except ValueError:
+            return Response({"error": "days must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        pairs = ConversionPairStats.objects.filter(user=request.user).order_by("-conversion_count")
+        daily = ConversionDailyStats.objects.filter(
+            user=request.user, date__gt=timezone.now().date() - timedelta(days=days)
+        ).order_by("date")
+
+        pairs_data = ConversionPairStatsSerializer(pairs, many=True).data
+        return Response(
+            {
+                "total_conversions": sum(pair["conversion_count"] for pair in pairs_data),
+                "most_used_pairs": pairs_data[:5],
+                "pairs": pairs_data,
+                "daily": ConversionDailyStatsSerializer(daily, many=True).data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class HoldingListView(generics.ListCreateAPIView):
+    """
+    API to list the user's holdings or add one.
+    Adding a coin that is already held replaces its amount.
+    """
+
+    serializer_class = HoldingSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return Holding.objects.filter(user=self.request.user).select_related("coin").order_by("coin__symbol")
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class HoldingDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """API to get, change the amount of, or remove one holding by symbol."""
+
+    serializer_class = HoldingSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        return get_object_or_404(
+            Holding.objects.select_related("coin"),
+            user=self.request.user,
+            coin__symbol=self.kwargs["symbol"].upper(),
+        )
+
+
+class PriceAlertListView(generics.ListCreateAPIView):
+    """
+    API to list the user's price alerts or create one.
+    Alerts fire once when an ingest moves the price or 24h change across the threshold.
+    """
+
+    serializer_class = PriceAlertSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return PriceAlert.objects.filter(user=self.request.user).select_related("coin").order_by("-created_at")
+
+    def perform_create(self, serializer):
+        if PriceAlert.objects.filter(user=self.request.user).count() >= settings.PRICE_ALERT_MAX_PER_USER:
+            raise ValidationError({"error": f"At most {settings.PRICE_ALERT_MAX_PER_USER} alerts per user."})
+        serializer.save(user=self.request.user)
+
+
+class PriceAlertDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """API to get, change, re-arm (active: true) or delete one price alert."""
+
+    serializer_class = PriceAlertSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return PriceAlert.objects.filter(user=self.request.user).select_related("coin")
+
+
+class PortfolioValueView(views.APIView):
+    """
+    API to value the user's holdings at current prices.
+    Values are in USD or, with ?quote=SYMBOL, in any coin or FX table currency.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        serializer = PortfolioQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        quote = serializer.validated_data["quote"]
+        positions = load_holdings([request.user.id]).get(request.user.id, [])
+        valuations = value_portfolios({request.user.id: positions}, get_price_snapshot(), quote)
+        if valuations is None:
+            return Response({"error": INVALID_SYMBOL_ERROR}, status=status.HTTP_400_BAD_REQUEST)
+
+        valuation = valuations[request.user.id]
+        holdings = [
+            {"symbol": symbol, "amount": amount, "value": round(valuation["holdings"][symbol], 8)}
+            for symbol, amount in positions
+        ]
+        holdings.sort(key=lambda holding: holding["value"], reverse=True)
+
+        return Response(
+            {"quote": quote, "total": round(valuation["total"], 8), "holdings": holdings},
+            status=status.HTTP_200_OK,
+        )
+
+
+class PortfolioHistoryView(views.APIView):
+    """
+    API to get the value of the user's current holdings over a past range.
+    Accepts a range (e.g. 24h, 7d, 1y), a target number of points and a quote currency.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        serializer = PortfolioHistoryQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        positions = load_holdings([request.user.id]).get(request.user.id, [])
+        history = portfolio_history(positions, data["range"], data["points"], data["quote"])
+        if history is None:
+            return Response({"error": INVALID_SYMBOL_ERROR}, status=status.HTTP_400_BAD_REQUEST)
+
+        tier, series = history
+        return Response(
+            {
+                "quote": data["quote"],
+                "range": request.query_params.get("range", "7d"),
+                "tier": tier,
+                "points": [[int(x * 1000), round(y, 8)] for x, y in series],
+            },
+            status=status.HTTP_200_OK,
+        )
 
 
 class APRCalculatorView(views.APIView):
@@ -127,23 +649,131 @@ class APRCalculatorView(views.APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class APRScenarioView(views.APIView):
+    """
+    API to value a principal under a grid of rates, terms and compounding methods.
+    Optionally adds the per-period schedule of one (schedule_rate, schedule_term) scenario.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = APRScenarioSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        symbol = data["crypto_symbol"]
+        # Read the price once so every scenario is valued against the same snapshot
+        price = float(get_price_snapshot().price(symbol))
+        schedule = (data["schedule_rate"], data["schedule_term"]) if "schedule_rate" in data else None
+
+        return Response(
+            {
+                "crypto_symbol": symbol,
+                "price_usd": price,
+                "principal_in_crypto": data["principal"],
+                **scenario_grid(data["principal"], price, data["rates"], data["terms"], data["compounding"], schedule),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
 class UpdateCryptoData(views.APIView):
     """
-    Fetch cryptocurrency prices from API and update the database.
-    Returns a list of updated cryptocurrency symbols.
+    Return the latest completed price refresh.
+    Starts a background refresh when that result is stale, without waiting for it.
     """
 
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        updated_symbols = get_crypto_data()
-        return Response({"updated_cryptos": updated_symbols}, status=status.HTTP_200_OK)
+        refresh = latest_refresh()
+        refresh_started = is_stale(refresh) and trigger_refresh(trigger="request")
+
+        return Response(
+            {
+                "updated_cryptos": refresh.updated_symbols if refresh else [],
+                "unchanged_count": refresh.unchanged_count if refresh else 0,
+                "last_refresh": refresh.finished_at if refresh else None,
+                "refresh_started": refresh_started,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class MetricsView(views.APIView):
+    """
+    API for staff to inspect in-process queues and caches of this worker.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            {
+                "conversion_history_buffer": get_history_buffer().stats(),
+                "response_cache": response_cache.stats(),
+                "price_stream": get_broadcaster().stats(),
+                "user_cache": user_cache.stats(),
+                "revoked_tokens": revocations.stats(),
+            },
+            status=status.HTTP_200_OK,
+        )
 
 
 @api_view(["POST"])
 def logout_view(request):
+    revoke_request_tokens(request)
     logout(request)
     response = Response({"message": "Logged out"}, status=status.HTTP_200_OK)
     response.delete_cookie("access_token")
     response.delete_cookie("refresh_token")
     return response
+
+
+def _stream_user(request):
+    try:
+        result = JWTAuthenticationFromCookies().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+async def price_stream(request):
+    """
+    API to stream price deltas as Server-Sent Events.
+    Sends a snapshot first, then a `prices` event after every ingest that
+    changed one of the symbols requested with ?symbols=BTC,ETH (default: all).
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"error": "The price stream requires an ASGI server."}, status=status.HTTP_501_NOT_IMPLEMENTED)
+
+    user = await sync_to_async(_stream_user)(request)
+    if user is None:
+        return JsonResponse({"error": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED)
+
+    symbols = {symbol.strip().upper() for symbol in request.GET.get("symbols", "").split(",") if symbol.strip()}
+    broadcaster = get_broadcaster()
+    # Subscribe before taking the snapshot so no ingest falls in between
+    subscription = broadcaster.subscribe(symbols)
+
+    async def events():
+        try:
+            yield await sync_to_async(subscription.snapshot)()
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), settings.CRYPTO_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if message is RESYNC:
+                    message = await sync_to_async(subscription.snapshot)()
+                yield message
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,160 @@
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from django.db import DataError, IntegrityError, close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# Errors caused by the rows themselves; anything else (a lost connection, a
+# locked table) is assumed to be transient and the rows are retried later
+ROW_ERRORS = (DataError, IntegrityError)
+
+
+class WriteBehindBuffer:
+    """
+    Queue unsaved model instances in memory and bulk insert them from a
+    background thread once `max_size` rows are waiting or `max_delay` seconds
+    have passed. Whatever is still queued is flushed when the process exits.
+    `on_flush` is called with each inserted batch inside the insert transaction.
+
+    When a batch is rejected because of its rows, it is split in halves until
+    the offending rows are isolated; those are logged and kept in `dead_letters`
+    instead of being requeued, so one bad row cannot block every later flush.
+    """
+
+    def __init__(self, model, max_size=500, max_delay=1.0, max_pending=100_000, on_flush=None, max_dead_letters=1000):
+        self.model = model
+        self.on_flush = on_flush
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+
+        self._pending = []
+        self.dead_letters = deque(maxlen=max_dead_letters)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.dead_lettered = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def add(self, objs):
+        with self._lock:
+            self._pending.extend(objs)
+            self.queued += len(objs)
+            depth = len(self._pending)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+        if depth >= self.max_size:
+            self._wakeup.set()
+
+    def depth(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Insert everything queued so far. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+
+            start = time.perf_counter()
+            written = self._write_isolating(batch)
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if written:
+                self.flushes += 1
+                self.flushed += written
+                self.last_flush_ms = elapsed_ms
+                self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+                logger.debug(f"Flushed {written} {self.model.__name__} rows in {elapsed_ms:.1f} ms, {self.depth()} queued")
+            return written
+
+    def _write(self, rows):
+        with transaction.atomic():
+            self.model.objects.bulk_create(rows, batch_size=self.max_size)
+            if self.on_flush:
+                self.on_flush(rows)
+
+    def _write_isolating(self, batch):
+        """Write `batch`, bisecting around rows the database rejects. Returns the number of rows written."""
+        written = 0
+        chunks = [batch]
+        while chunks:
+            chunk = chunks.pop()
+            try:
+                self._write(chunk)
+                written += len(chunk)
+            except ROW_ERRORS as error:
+                if len(chunk) == 1:
+                    self._dead_letter(chunk[0], error)
+                else:
+                    middle = len(chunk) // 2
+                    chunks += [chunk[middle:], chunk[:middle]]
+            except Exception:
+                unwritten = chunk + [row for rest in reversed(chunks) for row in rest]
+                logger.exception(f"Write-behind flush of {len(unwritten)} {self.model.__name__} rows failed")
+                self._requeue(unwritten)
+                break
+        return written
+
+    def _dead_letter(self, row, error):
+        self.dead_letters.append((row, str(error)))
+        self.dead_lettered += 1
+        fields = {field.attname: getattr(row, field.attname) for field in self.model._meta.concrete_fields}
+        logger.error(f"Write-behind dropped a {self.model.__name__} row the database rejects ({error}): {fields}")
+
+    def _requeue(self, batch):
+        with self._lock:
+            self._pending[:0] = batch
+            overflow = len(self._pending) - self.max_pending
+            if overflow > 0:
+                # Drop the oldest rows rather than grow without bound while the database is down
+                del self._pending[:overflow]
+                self.dropped += overflow
+                logger.error(f"Write-behind queue full, dropped {overflow} {self.model.__name__} rows")
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                self._wakeup.wait(self.max_delay)
+                self._wakeup.clear()
+                close_old_connections()
+                self.flush()
+        finally:
+            connection.close()
+
+    def close(self):
+        """Stop the background thread and flush whatever is left."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.max_delay + 5)
+        self.flush()
+
+    def stats(self):
+        return {
+            "depth": self.depth(),
+            "queued": self.queued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "dead_lettered": self.dead_lettered,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
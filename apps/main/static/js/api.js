@@ -49,6 +49,18 @@ export async function fetchCryptoDetail(symbol) {
     return res.json();
 }
 
+// Subscribe to live price deltas; pass no symbols to follow every coin
+export function openPriceStream(onPrices, symbols = []) {
+    if (!window.EventSource) return null;
+
+    const query = symbols.length ? `?symbols=${encodeURIComponent(symbols.join(","))}` : "";
+    const source = new EventSource(`/api/price-stream/${query}`, { withCredentials: true });
+    const handle = (event) => onPrices(JSON.parse(event.data).prices);
+    source.addEventListener("snapshot", handle);
+    source.addEventListener("prices", handle);
+    return source;
+}
+
 // Convert crypto amount
 export async function convertCrypto(from, to, amount) {
     const res = await authorizedFetch("/api/crypto-conversion/", {
@@ -58,9 +70,9 @@ export async function convertCrypto(from, to, amount) {
     return res.json();
 }
 
-// Get past conversions
-export async function fetchConversionHistory() {
-    const res = await authorizedFetch("/api/conversion-history/");
+// Get one page of past conversions; pass the previous page's `next` URL to continue
+export async function fetchConversionHistory(url = "/api/conversion-history/") {
+    const res = await authorizedFetch(url);
     return res.json();
 }
 
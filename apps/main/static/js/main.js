@@ -8,6 +8,7 @@ import {
     fetchConversionHistory,
     calculateAPR,
     updateCryptoData,
+    openPriceStream,
     getCookie
 } from "./api.js";
 
@@ -27,6 +28,9 @@ document.addEventListener("DOMContentLoaded", () => {
 
 window.addEventListener("hashchange", router);
 
+// Live price stream of the current page, closed on navigation
+let priceStream = null;
+
 // ==============================
 // GLOBAL APP CONTAINER
 // ==============================
@@ -49,6 +53,11 @@ function renderAlert(message, type = "info") {
 // ROUTER LOGIC
 // ==============================
 async function router() {
+    if (priceStream) {
+        priceStream.close();
+        priceStream = null;
+    }
+
     const path = window.location.hash.slice(1) || "/";
     const routes = {
         "/": renderCryptoList,
@@ -119,11 +128,11 @@ async function renderCryptoList() {
             </thead>
             <tbody>
                 ${data.map(c => `
-                    <tr>
+                    <tr data-symbol="${c.symbol}">
                         <td><a href="#/crypto/${c.symbol}">${c.name}</a></td>
                         <td>${c.symbol.toUpperCase()}</td>
-                        <td class="text-end">$${formatPrice(c.price_usd)}</td>
-                        <td class="text-end ${parseFloat(c.percent_change_24h) < 0 ? 'text-danger' : 'text-success'}">${parseFloat(c.percent_change_24h).toFixed(2)}%</td>
+                        <td class="text-end" data-field="price">$${formatPrice(c.price_usd)}</td>
+                        <td class="text-end ${parseFloat(c.percent_change_24h) < 0 ? 'text-danger' : 'text-success'}" data-field="change">${parseFloat(c.percent_change_24h).toFixed(2)}%</td>
                         <td class="text-end">${formatHumanReadableNumber(c.market_cap)}</td>
                         <td class="text-end">${formatHumanReadableNumber(c.volume_24h)}</td>
                         <td class="text-end">${formatHumanReadableNumber(c.circulating_supply)}</td>
@@ -173,9 +182,24 @@ async function renderCryptoList() {
         }
     };
 
+    const applyPrices = (prices) => {
+        for (const [symbol, c] of Object.entries(prices)) {
+            const row = app.querySelector(`tr[data-symbol="${symbol}"]`);
+            if (!row) continue;
+
+            const change = parseFloat(c.percent_change_24h);
+            const changeCell = row.querySelector('[data-field="change"]');
+            row.querySelector('[data-field="price"]').textContent = `$${formatPrice(c.price_usd)}`;
+            changeCell.textContent = `${change.toFixed(2)}%`;
+            changeCell.classList.toggle("text-danger", change < 0);
+            changeCell.classList.toggle("text-success", change >= 0);
+        }
+    };
+
     try {
         const data = await fetchCryptoList();
         renderPage(data);
+        priceStream = openPriceStream(applyPrices);
     } catch (err) {
         console.error(err);
         app.innerHTML = renderAlert("Failed to fetch crypto list.", "danger");
@@ -458,39 +482,62 @@ async function renderHistory() {
         </div>
     `;
 
+    const historyTableBody = app.querySelector('.table-responsive tbody');
+
+    const renderRows = (items) => items.map(item => {
+        const timestamp = new Date(item.timestamp).toLocaleString();
+        const amountFormatted = parseFloat(item.amount).toLocaleString(undefined, { minimumFractionDigits: 4, maximumFractionDigits: 4 });
+        const convertedAmountFormatted = parseFloat(item.converted_amount).toLocaleString(undefined, { minimumFractionDigits: 4, maximumFractionDigits: 4 });
+        const rateFormatted = parseFloat(item.conversion_rate).toLocaleString(undefined, { minimumFractionDigits: 4, maximumFractionDigits: 4 });
+
+        return `
+            <tr>
+                <td>${timestamp}</td>
+                <td>${item.from_currency.toUpperCase()}</td>
+                <td>${amountFormatted}</td>
+                <td>${item.to_currency.toUpperCase()}</td>
+                <td>${convertedAmountFormatted}</td>
+                <td>${rateFormatted}</td>
+            </tr>
+        `;
+    }).join("");
+
+    // History is cursor paginated; each "Load more" appends the next page
+    const loadPage = async (url) => {
+        const page = await fetchConversionHistory(url);
+        historyTableBody.insertAdjacentHTML("beforeend", renderRows(page.results));
+
+        app.querySelector('#history-load-more')?.remove();
+        if (page.next) {
+            app.querySelector('.table-responsive').insertAdjacentHTML("afterend", `
+                <div class="text-center mb-4">
+                    <button id="history-load-more" class="btn btn-outline-primary btn-sm">Load more</button>
+                </div>
+            `);
+            app.querySelector('#history-load-more').addEventListener("click", async (event) => {
+                event.target.disabled = true;
+                try {
+                    await loadPage(page.next);
+                } catch (err) {
+                    console.error(err);
+                    event.target.disabled = false;
+                }
+            });
+        }
+        return page;
+    };
+
     try {
-        const data = await fetchConversionHistory();
-        const historyTableBody = app.querySelector('.table-responsive tbody');
         historyTableBody.innerHTML = '';
+        const firstPage = await loadPage();
 
-        if (!data || data.length === 0) {
+        if (firstPage.results.length === 0) {
             historyTableBody.innerHTML = `<tr><td colspan="6" class="text-center">No conversion history available.</td></tr>`;
-            return;
         }
 
-        const formattedHistory = data.map(item => {
-            const timestamp = new Date(item.timestamp).toLocaleString();
-            const amountFormatted = parseFloat(item.amount).toLocaleString(undefined, { minimumFractionDigits: 4, maximumFractionDigits: 4 });
-            const convertedAmountFormatted = parseFloat(item.converted_amount).toLocaleString(undefined, { minimumFractionDigits: 4, maximumFractionDigits: 4 });
-            const rateFormatted = parseFloat(item.conversion_rate).toLocaleString(undefined, { minimumFractionDigits: 4, maximumFractionDigits: 4 });
-
-            return `
-                <tr>
-                    <td>${timestamp}</td>
-                    <td>${item.from_currency.toUpperCase()}</td>
-                    <td>${amountFormatted}</td>
-                    <td>${item.to_currency.toUpperCase()}</td>
-                    <td>${convertedAmountFormatted}</td>
-                    <td>${rateFormatted}</td>
-                </tr>
-            `;
-        }).join("");
-
-        historyTableBody.innerHTML = formattedHistory;
-
     } catch (err) {
         console.error(err);
-        app.querySelector('.table-responsive tbody').innerHTML = `<tr><td colspan="6" class="text-center">${renderAlert("Failed to load history ❌", "danger")}</td></tr>`;
+        historyTableBody.innerHTML = `<tr><td colspan="6" class="text-center">${renderAlert("Failed to load history ❌", "danger")}</td></tr>`;
     }
 }
 
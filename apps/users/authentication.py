@@ -1,8 +1,86 @@
 # apps/users/authentication.py
 
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from apps.users.revocation import is_token_revoked
+
+
+class UserCache:
+    """
+    Bounded LRU of resolved users keyed by (user id, token id), each entry
+    kept for `ttl` seconds. Saving or deleting a user drops its entries in
+    this process; other processes pick the change up within `ttl`.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.keys_by_user = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            # Each request gets its own copy so per-request state never leaks between them
+            return copy.copy(entry[0])
+
+    def set(self, key, user):
+        with self.lock:
+            self.entries[key] = (user, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            self.keys_by_user.setdefault(key[0], set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self._discard(next(iter(self.entries)))
+
+    def discard(self, key):
+        """Drop one (user id, token id) entry, e.g. once its token is revoked."""
+        with self.lock:
+            self._discard(key)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            for key in self.keys_by_user.pop(user_id, ()):
+                self.entries.pop(key, None)
+            self.invalidations += 1
+
+    def _discard(self, key):
+        self.entries.pop(key, None)
+        keys = self.keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.keys_by_user[key[0]]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+user_cache = UserCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL)
 
 
 class JWTAuthenticationFromCookies(JWTAuthentication):
@@ -16,4 +94,24 @@ class JWTAuthenticationFromCookies(JWTAuthentication):
         except TokenError:
             raise AuthenticationFailed("Invalid or expired token")
 
+        if is_token_revoked(validated_token):
+            user_cache.discard(self._cache_key(validated_token))
+            raise AuthenticationFailed("Token has been revoked")
+
         return self.get_user(validated_token), validated_token
+
+    @staticmethod
+    def _cache_key(validated_token):
+        return validated_token.get(api_settings.USER_ID_CLAIM), validated_token.get(api_settings.JTI_CLAIM)
+
+    def get_user(self, validated_token):
+        """Resolve the token's user from the cache, falling back to the database."""
+        key = self._cache_key(validated_token)
+        if key[0] is None or settings.AUTH_USER_CACHE_TTL <= 0:
+            return super().get_user(validated_token)
+
+        user = user_cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(key, user)
+        return user
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from apps.users.revocation import prune_revoked_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete revoked tokens that have expired and can no longer be presented"
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"revoked tokens: {prune_revoked_tokens()} rows deleted")
+
+        self.stdout.write(self.style.SUCCESS("✅ Revoked tokens pruned!"))
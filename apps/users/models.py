@@ -0,0 +1,11 @@
+from django.db import models
+
+
+class RevokedToken(models.Model):
+    """A JWT that must no longer be accepted, kept until the token would have expired anyway."""
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Revoked {self.jti} (expires {self.expires_at:%Y-%m-%d %H:%M})"
@@ -0,0 +1,214 @@
+# apps/users/revocation.py
+
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+from apps.users.models import RevokedToken
+
+# Revocations saved this long before the last sync are fetched again, to cover
+# transactions that committed after that sync started
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def bloom_key(item):
+    """Hash a string once into the (first, second) pair every BloomFilter probes with."""
+    digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over bloom_key() pairs: no false negatives, and
+    false positives at about `error_rate` while it holds at most `capacity` items.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hashing derives every probe from one digest (Kirsch-Mitzenmacher)
+        first, second = key
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+
+class RevocationFilter:
+    """
+    In-memory view of RevokedToken for one process.
+
+    Revoked ids are kept in Bloom filters bucketed by token expiry, so a
+    lookup only probes the bucket its token's `exp` falls in, and a bucket is
+    dropped whole once every token in it has expired. A bucket that fills up
+    gets another filter rather than a rising false positive rate. A miss is
+    final; a hit is confirmed against the table, so the database only sees
+    revoked tokens and the rare false positive.
+
+    Revocations made by other processes arrive with the next sync, at most
+    `sync_interval` seconds later.
+    """
+
+    def __init__(self, bucket_seconds, capacity, error_rate, sync_interval):
+        self.bucket_seconds = bucket_seconds
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.synced_at = None
+        self.checked_at = None
+        self.lookups = 0
+        self.hits = 0
+        self.false_positives = 0
+
+    def add(self, jti, exp):
+        """Remember a revoked token id; `exp` is the token's expiry as epoch seconds."""
+        bucket = int(exp) // self.bucket_seconds
+        key = bloom_key(jti)
+        with self.lock:
+            filters = self.buckets.setdefault(bucket, [])
+            # Already present (or a false positive, which lookups treat the same way)
+            if any(key in bloom for bloom in filters):
+                return
+            if not filters or filters[-1].full:
+                filters.append(BloomFilter(self.capacity, self.error_rate))
+            filters[-1].add(key)
+
+    def might_contain(self, jti, exp):
+        filters = self.buckets.get(int(exp) // self.bucket_seconds)
+        if not filters:
+            return False
+        key = bloom_key(jti)
+        return any(key in bloom for bloom in filters)
+
+    def expire(self, now=None):
+        """Drop buckets whose tokens have all expired."""
+        current = int(now if now is not None else time.time()) // self.bucket_seconds
+        with self.lock:
+            for bucket in [bucket for bucket in self.buckets if bucket < current]:
+                del self.buckets[bucket]
+
+    def sync(self):
+        """Load revocations made since the last sync, at most once per sync interval."""
+        with self.lock:
+            if self.checked_at is not None and time.monotonic() - self.checked_at < self.sync_interval:
+                return
+            # Claimed up front so concurrent requests do not all run the same sync
+            self.checked_at = time.monotonic()
+
+        now = timezone.now()
+        rows = RevokedToken.objects.filter(expires_at__gt=now)
+        if self.synced_at is not None:
+            rows = rows.filter(revoked_at__gte=self.synced_at - SYNC_OVERLAP)
+
+        for jti, expires_at in rows.values_list("jti", "expires_at").iterator(chunk_size=10_000):
+            self.add(jti, expires_at.timestamp())
+        self.expire(now.timestamp())
+        self.synced_at = now
+
+    def is_revoked(self, jti, exp):
+        """Whether the token was revoked; touches the database only on a filter hit."""
+        self.sync()
+        self.lookups += 1
+        if not self.might_contain(jti, exp):
+            return False
+
+        self.hits += 1
+        if RevokedToken.objects.filter(jti=jti).exists():
+            return True
+        self.false_positives += 1
+        return False
+
+    def stats(self):
+        with self.lock:
+            filters = [bloom for filters in self.buckets.values() for bloom in filters]
+            return {
+                "buckets": len(self.buckets),
+                "filters": len(filters),
+                "entries": sum(bloom.count for bloom in filters),
+                "bytes": sum(len(bloom.bits) for bloom in filters),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "false_positives": self.false_positives,
+            }
+
+
+revocations = RevocationFilter(
+    settings.REVOKED_TOKEN_BUCKET_SECONDS,
+    settings.REVOKED_TOKEN_FILTER_CAPACITY,
+    settings.REVOKED_TOKEN_FILTER_ERROR_RATE,
+    settings.REVOKED_TOKEN_SYNC_INTERVAL,
+)
+
+
+def _claims(token):
+    return token[api_settings.JTI_CLAIM], token["exp"]
+
+
+def is_token_revoked(token):
+    """Whether a validated token has been revoked."""
+    return revocations.is_revoked(*_claims(token))
+
+
+def revoke_token(token):
+    """
+    Revoke a validated token in one insert. Returns False when it was already
+    revoked, which for a rotated refresh token means it is being replayed.
+    """
+    jti, exp = _claims(token)
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=jti, expires_at=datetime.fromtimestamp(exp, tz=dt_timezone.utc))
+    except IntegrityError:
+        return False
+    revocations.add(jti, exp)
+    return True
+
+
+def revoke_raw_tokens(*raw_tokens):
+    """Revoke every still-valid token among the given encoded tokens in one insert; others are skipped."""
+    tokens = []
+    for raw in raw_tokens:
+        if not raw:
+            continue
+        try:
+            tokens.append(_claims(UntypedToken(raw)))
+        except (TokenError, KeyError):
+            continue
+
+    RevokedToken.objects.bulk_create(
+        [RevokedToken(jti=jti, expires_at=datetime.fromtimestamp(exp, tz=dt_timezone.utc)) for jti, exp in tokens],
+        ignore_conflicts=True,
+    )
+    for jti, exp in tokens:
+        revocations.add(jti, exp)
+    return len(tokens)
+
+
+def prune_revoked_tokens():
+    """Delete revocations for tokens that have expired anyway; returns the number of rows deleted."""
+    deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
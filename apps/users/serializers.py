@@ -1,6 +1,44 @@
 from dj_rest_auth.serializers import UserDetailsSerializer
-from rest_framework import serializers
+from django.contrib.auth import get_user_model
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from apps.users.revocation import is_token_revoked, revoke_token
 
 class CustomUserSerializer(UserDetailsSerializer):
     class Meta(UserDetailsSerializer.Meta):
         fields = ("id", "username", "email", "first_name", "last_name")
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer backed by apps.users.revocation instead of simplejwt's
+    token_blacklist app, which is not installed: revoked refresh tokens are
+    refused and each rotated token is revoked as it is exchanged.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        rotate = api_settings.ROTATE_REFRESH_TOKENS
+
+        if rotate and api_settings.BLACKLIST_AFTER_ROTATION:
+            # The revoking insert doubles as the check, so a replayed token loses the race
+            if not revoke_token(refresh):
+                raise AuthenticationFailed("Token has been revoked", "token_not_valid")
+        elif is_token_revoked(refresh):
+            raise AuthenticationFailed("Token has been revoked", "token_not_valid")
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None:
+            user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+            if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+                raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        data = {"access": str(refresh.access_token)}
+        if rotate:
+            # simplejwt's own rotation also records an outstanding token, which needs token_blacklist
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+        return data
@@ -0,0 +1,13 @@
+# apps/users/signals.py
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.users.authentication import user_cache
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop a saved, deactivated or deleted user from the authentication cache."""
+    user_cache.invalidate(instance.pk)
@@ -1,3 +1,91 @@
+from datetime import datetime, timezone as dt_timezone
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.users.authentication import user_cache
+from apps.users.models import RevokedToken
+from apps.users.revocation import revocations, revoke_token
 
-# Create your tests here.
+REFRESH_URL = "/auth/api/token/refresh/"
+PROTECTED_URL = "/api/crypto-list/"
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        self.refresh = RefreshToken.for_user(User.objects.create_user("holder", password="secret"))
+        self.client = APIClient()
+        # Make the next request sync, as if the sync interval had passed
+        revocations.checked_at = None
+
+    def refresh_with(self, raw_refresh):
+        self.client.cookies["refresh_token"] = raw_refresh
+        return self.client.post(REFRESH_URL)
+
+    def test_revoked_access_token_is_refused_once_the_filter_syncs(self):
+        access = self.refresh.access_token
+        self.client.cookies["access_token"] = str(access)
+        self.assertEqual(self.client.get(PROTECTED_URL).status_code, 200)
+
+        # Revoked by another worker: this process only learns of it through a sync
+        RevokedToken.objects.create(
+            jti=access["jti"], expires_at=datetime.fromtimestamp(access["exp"], tz=dt_timezone.utc)
+        )
+        revocations.checked_at = None
+
+        self.assertEqual(self.client.get(PROTECTED_URL).status_code, 401)
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        original = str(self.refresh)
+        response = self.refresh_with(original)
+        self.assertEqual(response.status_code, 200)
+        rotated = response.cookies["refresh_token"].value
+        self.assertNotEqual(rotated, original)
+
+        self.assertEqual(self.refresh_with(original).status_code, 401)
+        self.assertEqual(self.refresh_with(rotated).status_code, 200)
+
+    def test_logged_out_tokens_are_refused(self):
+        access, refresh = str(self.refresh.access_token), str(self.refresh)
+        self.client.cookies["access_token"] = access
+        self.client.cookies["refresh_token"] = refresh
+        self.assertEqual(self.client.post("/auth/api/logout/").status_code, 200)
+
+        self.client.cookies["access_token"] = access
+        self.assertEqual(self.client.get(PROTECTED_URL).status_code, 401)
+        self.assertEqual(self.refresh_with(refresh).status_code, 401)
+
+    def test_invalid_tokens_are_unauthorized(self):
+        self.assertEqual(self.refresh_with("not-a-token").status_code, 401)
+
+        self.client.cookies["access_token"] = "not-a-token"
+        self.assertEqual(self.client.get(PROTECTED_URL).status_code, 401)
+
+
+class UserCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("cached", password="secret")
+        self.access = RefreshToken.for_user(self.user).access_token
+        self.key = (self.user.pk, self.access["jti"])
+        self.client = APIClient()
+        self.client.cookies["access_token"] = str(self.access)
+        revocations.checked_at = None
+
+    def test_authenticated_user_is_cached_per_token(self):
+        self.assertEqual(self.client.get(PROTECTED_URL).status_code, 200)
+        self.assertEqual(user_cache.get(self.key).pk, self.user.pk)
+
+    def test_revoking_the_token_drops_its_entry(self):
+        self.client.get(PROTECTED_URL)
+        revoke_token(self.access)
+
+        self.assertEqual(self.client.get(PROTECTED_URL).status_code, 401)
+        self.assertIsNone(user_cache.get(self.key))
+
+    def test_saving_the_user_drops_its_entries(self):
+        self.client.get(PROTECTED_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertIsNone(user_cache.get(self.key))
+        self.assertEqual(self.client.get(PROTECTED_URL).status_code, 401)
@@ -1,4 +1,7 @@
+from dj_rest_auth.views import LogoutView
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.shortcuts import render, redirect
@@ -6,6 +9,7 @@ from apps.users.forms import CustomUserCreationForm, CustomAuthenticationForm
 from django.contrib.auth import login, get_backends
 from django.conf import settings
 from django.urls import reverse
+from apps.users.revocation import revoke_raw_tokens
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,6 +29,9 @@ class CookieTokenRefreshView(TokenRefreshView):
         try:
             serializer.is_valid(raise_exception=True)
             logger.info("Refresh token is valid. Issuing new access token.")
+        except (TokenError, AuthenticationFailed) as e:
+            logger.warning(f"Refresh token rejected: {e}")
+            return Response({'error': str(e)}, status=401)
         except Exception as e:
             logger.error(f"Refresh token validation failed: {e}", exc_info=True)
             return Response(serializer.errors, status=401)
@@ -42,9 +49,37 @@ class CookieTokenRefreshView(TokenRefreshView):
             path='/'
         )
         logger.info("New access token set via cookie.")
+
+        # With rotation the old refresh token is now revoked, so the cookie must carry its replacement
+        rotated_refresh = serializer.validated_data.get('refresh')
+        if rotated_refresh:
+            response.set_cookie(
+                key=settings.DJ_REST_AUTH.get('JWT_AUTH_REFRESH_COOKIE', 'refresh_token'),
+                value=rotated_refresh,
+                httponly=settings.DJ_REST_AUTH.get('JWT_AUTH_HTTPONLY', True),
+                secure=settings.DJ_REST_AUTH.get('JWT_AUTH_SECURE', not settings.DEBUG),
+                samesite=settings.DJ_REST_AUTH.get('JWT_AUTH_SAMESITE', 'Lax'),
+                path='/'
+            )
         return response
 
 
+def revoke_request_tokens(request):
+    """Revoke the access and refresh tokens a request carries in its cookies."""
+    revoked = revoke_raw_tokens(
+        request.COOKIES.get(settings.DJ_REST_AUTH.get('JWT_AUTH_COOKIE', 'access_token')),
+        request.COOKIES.get(settings.DJ_REST_AUTH.get('JWT_AUTH_REFRESH_COOKIE', 'refresh_token')),
+    )
+    logger.info(f"Revoked {revoked} tokens on logout.")
+    return revoked
+
+
+class CookieLogoutView(LogoutView):
+    def logout(self, request):
+        revoke_request_tokens(request)
+        return super().logout(request)
+
+
 def _set_jwt_cookies_and_redirect(request, user):
     logger.info(f"Issuing JWT tokens for user: {user.username} (ID: {user.id})")
     try:
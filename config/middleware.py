@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+
+
+class LeanRouteMixin:
+    """
+    Skip the wrapped middleware for stateless API paths (LEAN_MIDDLEWARE_PATHS,
+    minus LEAN_MIDDLEWARE_EXCLUDE). Other paths run it unchanged.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.lean_paths = tuple(settings.LEAN_MIDDLEWARE_PATHS)
+        self.full_paths = tuple(settings.LEAN_MIDDLEWARE_EXCLUDE)
+
+    def is_lean(self, request):
+        path = request.path_info
+        return bool(self.lean_paths) and path.startswith(self.lean_paths) and not path.startswith(self.full_paths)
+
+    def __call__(self, request):
+        if self.is_lean(request):
+            # In async mode get_response returns a coroutine, which the caller awaits
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class LeanSessionMiddleware(LeanRouteMixin, SessionMiddleware):
+    pass
+
+
+class LeanAuthenticationMiddleware(LeanRouteMixin, AuthenticationMiddleware):
+    pass
+
+
+class LeanMessageMiddleware(LeanRouteMixin, MessageMiddleware):
+    pass
@@ -48,18 +48,24 @@ INSTALLED_APPS = [
 ]
 
 # ─────────── Middleware ───────────
+# Session, auth and message middleware are skipped on LEAN_MIDDLEWARE_PATHS (see config/middleware.py)
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "config.middleware.LeanSessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
+    "config.middleware.LeanAuthenticationMiddleware",
+    "config.middleware.LeanMessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
 ]
 
+# Stateless JWT routes that skip session loading, message storage and request.user setup.
+# Logout still needs the session to end server-side logins.
+LEAN_MIDDLEWARE_PATHS = env.list("LEAN_MIDDLEWARE_PATHS", default=["/api/"])
+LEAN_MIDDLEWARE_EXCLUDE = env.list("LEAN_MIDDLEWARE_EXCLUDE", default=["/api/logout/"])
+
 # ─────────── URLs / WSGI ───────────
 ROOT_URLCONF = "config.urls"
 WSGI_APPLICATION = "config.wsgi.application"
@@ -165,6 +171,8 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
     "ALGORITHM": "HS256",
     "SIGNING_KEY": env("SECRET_KEY"),
+    # Checks and records revocations in apps.users.revocation
+    "TOKEN_REFRESH_SERIALIZER": "apps.users.serializers.RevocableTokenRefreshSerializer",
 }
 
 # ─────────── Django REST Framework ───────────
@@ -178,6 +186,86 @@ REST_FRAMEWORK = {
     "USER_DETAILS_SERIALIZER": "apps.users.serializers.CustomUserSerializer",
 }
 
+# ─────────── Authentication Cache ───────────
+# Seconds a worker reuses a resolved JWT user; 0 resolves it on every request
+AUTH_USER_CACHE_TTL = env.int("AUTH_USER_CACHE_TTL", default=30)
+AUTH_USER_CACHE_SIZE = env.int("AUTH_USER_CACHE_SIZE", default=10000)
+
+# ─────────── Token Revocation ───────────
+# Revoked token ids are held per worker in Bloom filters grouped by token expiry
+REVOKED_TOKEN_BUCKET_SECONDS = env.int("REVOKED_TOKEN_BUCKET_SECONDS", default=3600)
+REVOKED_TOKEN_FILTER_CAPACITY = env.int("REVOKED_TOKEN_FILTER_CAPACITY", default=100000)
+REVOKED_TOKEN_FILTER_ERROR_RATE = env.float("REVOKED_TOKEN_FILTER_ERROR_RATE", default=0.001)
+# Seconds before a worker picks up tokens revoked by other workers
+REVOKED_TOKEN_SYNC_INTERVAL = env.float("REVOKED_TOKEN_SYNC_INTERVAL", default=2.0)
+
+# ─────────── Market Data Fetching ───────────
+COINGECKO_API_URL = env("COINGECKO_API_URL", default="https://api.coingecko.com/api/v3/coins/markets")
+CRYPTO_FETCH_PAGE_SIZE = env.int("CRYPTO_FETCH_PAGE_SIZE", default=250)
+CRYPTO_FETCH_WORKERS = env.int("CRYPTO_FETCH_WORKERS", default=4)
+CRYPTO_FETCH_RATE = env.float("CRYPTO_FETCH_RATE", default=0.5)
+CRYPTO_FETCH_BURST = env.int("CRYPTO_FETCH_BURST", default=5)
+# Retries for a page answered 429; waits Retry-After, else CRYPTO_FETCH_BACKOFF seconds doubled per attempt
+CRYPTO_FETCH_MAX_RETRIES = env.int("CRYPTO_FETCH_MAX_RETRIES", default=3)
+CRYPTO_FETCH_BACKOFF = env.float("CRYPTO_FETCH_BACKOFF", default=1.0)
+COINGECKO_FX_URL = env("COINGECKO_FX_URL", default="https://api.coingecko.com/api/v3/simple/price")
+# Fiat currencies kept in the FX table; prices can be quoted in any of them or USD
+CRYPTO_QUOTE_CURRENCIES = env.list("CRYPTO_QUOTE_CURRENCIES", default=["EUR", "GBP", "JPY"])
+# Relative change below which a fetched FX rate is treated as unchanged
+CRYPTO_FX_TOLERANCE = env.float("CRYPTO_FX_TOLERANCE", default=0.0001)
+
+# ─────────── Price Refresh ───────────
+CRYPTO_REFRESH_INTERVAL = env.int("CRYPTO_REFRESH_INTERVAL", default=60)
+CRYPTO_REFRESH_JITTER = env.int("CRYPTO_REFRESH_JITTER", default=10)
+CRYPTO_REFRESH_LOCK_TTL = env.int("CRYPTO_REFRESH_LOCK_TTL", default=120)
+# Seconds a worker trusts its cached ingest version before re-reading it
+INGEST_VERSION_TTL = env.float("INGEST_VERSION_TTL", default=1.0)
+# Ingest versions a delta feed client may fall behind before getting a full snapshot;
+# older versions are deleted by prune_price_history
+CRYPTO_CHANGES_MAX_VERSIONS = env.int("CRYPTO_CHANGES_MAX_VERSIONS", default=1440)
+
+# ─────────── Price History ───────────
+# Days to keep raw ticks and each rollup tier; None keeps a tier forever
+PRICE_HISTORY_RETENTION_DAYS = {
+    "raw": env.int("PRICE_TICK_RETENTION_DAYS", default=7),
+    "minute": env.int("PRICE_MINUTE_RETENTION_DAYS", default=30),
+    "hour": env.int("PRICE_HOUR_RETENTION_DAYS", default=365),
+    "day": None,
+}
+# Upper bound on rows read for one chart before downsampling
+CHART_MAX_SOURCE_POINTS = env.int("CHART_MAX_SOURCE_POINTS", default=5000)
+# Longest chart or portfolio history range a client may request
+CHART_MAX_RANGE_DAYS = env.int("CHART_MAX_RANGE_DAYS", default=3650)
+
+# ─────────── Response Cache ───────────
+# Keep rendered crypto list/detail bodies in memory per ingest version
+CRYPTO_RESPONSE_CACHE = env.bool("CRYPTO_RESPONSE_CACHE", default=True)
+CRYPTO_RESPONSE_CACHE_GZIP = env.bool("CRYPTO_RESPONSE_CACHE_GZIP", default=True)
+CRYPTO_RESPONSE_CACHE_ENTRIES = env.int("CRYPTO_RESPONSE_CACHE_ENTRIES", default=256)
+
+# ─────────── Price Stream ───────────
+# Seconds between ingest version checks by the per-process stream broadcaster
+CRYPTO_STREAM_POLL_INTERVAL = env.float("CRYPTO_STREAM_POLL_INTERVAL", default=1.0)
+CRYPTO_STREAM_KEEPALIVE = env.int("CRYPTO_STREAM_KEEPALIVE", default=15)
+# Undelivered events per client before it is sent a fresh snapshot instead
+CRYPTO_STREAM_QUEUE_SIZE = env.int("CRYPTO_STREAM_QUEUE_SIZE", default=16)
+
+# ─────────── Price Alerts ───────────
+# Dotted path to an apps.api.alerts.Notifier subclass. Alerts are evaluated after every
+# ingest in the process that ran it: the refresh_prices worker, or a web worker thread
+# when /api/update-data/ triggers a refresh, so notifiers must be safe to call from both
+PRICE_ALERT_NOTIFIER = env("PRICE_ALERT_NOTIFIER", default="apps.api.alerts.LogNotifier")
+# Seconds between full rebuilds of the in-memory alert index
+PRICE_ALERT_INDEX_REBUILD = env.int("PRICE_ALERT_INDEX_REBUILD", default=300)
+PRICE_ALERT_MAX_PER_USER = env.int("PRICE_ALERT_MAX_PER_USER", default=100)
+
+# ─────────── Conversions ───────────
+CONVERSION_BATCH_MAX_ITEMS = env.int("CONVERSION_BATCH_MAX_ITEMS", default=500)
+# Queue history rows in the worker and insert them in batches off the request path
+CONVERSION_HISTORY_WRITE_BEHIND = env.bool("CONVERSION_HISTORY_WRITE_BEHIND", default=False)
+CONVERSION_HISTORY_FLUSH_SIZE = env.int("CONVERSION_HISTORY_FLUSH_SIZE", default=500)
+CONVERSION_HISTORY_FLUSH_INTERVAL = env.float("CONVERSION_HISTORY_FLUSH_INTERVAL", default=1.0)
+
 # ─────────── Crispy Forms ───────────
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"